@@ -1,46 +1,139 @@
 import os
+import threading
 from dotenv import load_dotenv
 
-from azure.identity import DefaultAzureCredential
-from azure.keyvault.secrets import SecretClient
+from app.secret_loader import SecretCache, load_secrets
 
 load_dotenv()
 
 ENV = "prod"
 
-if ENV == "prod":
+VAULT_URL = os.getenv("VAULT_URL")
 
-    VAULT_URL = os.getenv("VAULT_URL") 
-    
+# setting -> Key Vault secret name
+SECRET_NAMES = {
+    "MONGODB_URI": "MONGOURI",
+    "DB_NAME": "DBNAME",
+    "JWT_SECRET": "JWTSECRET",
+    "API_BASE_URL": "APIBASEURL",
+    "ACS_CONNECTION_STRING": "ACSCONNECTIONSTRING",
+    "SENDER_ADDRESS": "SENDERADDRESS",
+    "OPEN_AI_API_KEY": "OPENAIAPIKEY",
+    "AZURE_STORAGE_CONNECTION_STRING": "AZURESTORAGECONNECTIONSTRING",
+    "AZURE_CONTAINER_NAME": "AZURECONTAINERNAME",
+    "AZURE_STORAGE_ACCOUNT": "AZURESTORAGEACCOUNT",
+    "AZURE_STORAGE_KEY": "AZURESTORAGEKEY",
+}
 
-    if not VAULT_URL:
-        raise Exception("❌ VAULT_URL not set for production")
+# Encrypted local copy of the vault secrets (disabled unless a Fernet key is set)
+SECRET_CACHE_PATH = os.getenv("SECRET_CACHE_PATH", ".secrets.cache")
+SECRET_CACHE_KEY = os.getenv("SECRET_CACHE_KEY")
+SECRET_CACHE_TTL_SECONDS = int(os.getenv("SECRET_CACHE_TTL_SECONDS", "900"))
 
-    credential = DefaultAzureCredential()
-    client = SecretClient(vault_url=VAULT_URL, credential=credential)
+_secrets_lock = threading.Lock()
 
-    MONGODB_URI = client.get_secret("MONGOURI").value
-    DB_NAME = client.get_secret("DBNAME").value
-    JWT_SECRET = client.get_secret("JWTSECRET").value
-    API_BASE_URL = client.get_secret("APIBASEURL").value
-    ACS_CONNECTION_STRING = client.get_secret("ACSCONNECTIONSTRING").value
-    SENDER_ADDRESS = client.get_secret("SENDERADDRESS").value
-    OPEN_AI_API_KEY = client.get_secret("OPENAIAPIKEY").value
-   
 
-
-    from azure.storage.blob import BlobServiceClient
-
-    AZURE_STORAGE_CONNECTION_STRING = client.get_secret("AZURESTORAGECONNECTIONSTRING").value
-    AZURE_CONTAINER_NAME = client.get_secret("AZURECONTAINERNAME").value
-    AZURE_STORAGE_ACCOUNT = client.get_secret("AZURESTORAGEACCOUNT").value
-    AZURE_STORAGE_KEY = client.get_secret("AZURESTORAGEKEY").value
-    blob_service_client = BlobServiceClient.from_connection_string(AZURE_STORAGE_CONNECTION_STRING)
-    container_client = blob_service_client.get_container_client(AZURE_CONTAINER_NAME)
-    try:
-        container_client.create_container()
-    except Exception:
-        pass  
+def __getattr__(name):
+    # Secrets are loaded together on first access, e.g. `from app.config import MONGODB_URI`,
+    # so importing config for plain tunables never touches the vault
+    if name not in SECRET_NAMES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _secrets_lock:
+        if name not in globals():
+            cache = SecretCache(SECRET_CACHE_PATH, SECRET_CACHE_KEY, SECRET_CACHE_TTL_SECONDS)
+            globals().update(load_secrets(SECRET_NAMES, VAULT_URL, cache))
+    return globals()[name]
 
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+# Slot availability cache (per doctor schedule and per doctor/day bitmap)
+SLOT_CACHE_TTL_SECONDS = int(os.getenv("SLOT_CACHE_TTL_SECONDS", "60"))
+SLOT_CACHE_MAX_ENTRIES = int(os.getenv("SLOT_CACHE_MAX_ENTRIES", "4096"))
+
+# Reminder dispatch
+REMINDER_CONCURRENCY = int(os.getenv("REMINDER_CONCURRENCY", "8"))
+REMINDER_RATE_PER_SECOND = float(os.getenv("REMINDER_RATE_PER_SECOND", "10"))
+# Rolling reminders: every REMINDER_INTERVAL_MINUTES, remind appointments starting
+# within the next REMINDER_LEAD_MINUTES (appointment times are naive local times)
+REMINDER_INTERVAL_MINUTES = int(os.getenv("REMINDER_INTERVAL_MINUTES", "5"))
+REMINDER_LEAD_MINUTES = int(os.getenv("REMINDER_LEAD_MINUTES", "120"))
+APPOINTMENT_TIMEZONE = os.getenv("APPOINTMENT_TIMEZONE", "Asia/Kolkata")
+
+# Background email delivery ("acs" or "fake" for offline runs)
+EMAIL_SENDER = os.getenv("EMAIL_SENDER", "acs")
+EMAIL_BATCH_MAX_RECIPIENTS = int(os.getenv("EMAIL_BATCH_MAX_RECIPIENTS", "50"))
+EMAIL_SEND_CONCURRENCY = int(os.getenv("EMAIL_SEND_CONCURRENCY", "4"))
+
+# Persistent email outbox
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_POLL_INTERVAL_SECONDS = float(os.getenv("OUTBOX_POLL_INTERVAL_SECONDS", "2"))
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "120"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6"))
+OUTBOX_BACKOFF_BASE_SECONDS = float(os.getenv("OUTBOX_BACKOFF_BASE_SECONDS", "30"))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "3600"))
+# Drain the outbox inside the API process too (disable when running app.worker)
+OUTBOX_INPROCESS_WORKER = os.getenv("OUTBOX_INPROCESS_WORKER", "true").lower() == "true"
+
+# OTP mail (SMTP)
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+# Credentials come from the environment only; OTP mail is skipped when unset
+SMTP_USERNAME = os.getenv("SMTP_USERNAME")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "2"))
+
+# Blob storage I/O
+BLOB_UPLOAD_CONCURRENCY = int(os.getenv("BLOB_UPLOAD_CONCURRENCY", "4"))
+BLOB_UPLOAD_READ_SIZE = int(os.getenv("BLOB_UPLOAD_READ_SIZE", str(4 * 1024 * 1024)))
+BLOB_DOWNLOAD_CHUNK_SIZE = int(os.getenv("BLOB_DOWNLOAD_CHUNK_SIZE", str(4 * 1024 * 1024)))
+
+# Resumable (chunked) uploads ("azure" staged blocks, or "local" for offline runs)
+UPLOAD_BACKEND = os.getenv("UPLOAD_BACKEND", "azure")
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(4 * 1024 * 1024)))
+UPLOAD_MAX_CHUNK_SIZE = int(os.getenv("UPLOAD_MAX_CHUNK_SIZE", str(32 * 1024 * 1024)))
+UPLOAD_MAX_FILE_SIZE = int(os.getenv("UPLOAD_MAX_FILE_SIZE", str(1024 * 1024 * 1024)))
+UPLOAD_SESSION_TTL_HOURS = int(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24"))
+
+# SAS URLs for medical records (signed once per blob and time bucket)
+SAS_TTL_SECONDS = int(os.getenv("SAS_TTL_SECONDS", "3600"))
+SAS_BUCKET_SECONDS = int(os.getenv("SAS_BUCKET_SECONDS", "300"))
+# Stop handing out a cached URL once it has less than this left to live
+SAS_MIN_REMAINING_SECONDS = int(os.getenv("SAS_MIN_REMAINING_SECONDS", "2700"))
+SAS_CACHE_MAX_ENTRIES = int(os.getenv("SAS_CACHE_MAX_ENTRIES", "50000"))
+
+# Scheduled jobs (run `python -m app.scheduler` and set SCHEDULER_INPROCESS=false
+# on the API processes to keep job execution off them)
+SCHEDULER_INPROCESS = os.getenv("SCHEDULER_INPROCESS", "true").lower() == "true"
+SCHEDULER_TIMEZONE = os.getenv("SCHEDULER_TIMEZONE", "Asia/Kolkata")
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_MISFIRE_GRACE_SECONDS = int(os.getenv("JOB_MISFIRE_GRACE_SECONDS", "300"))
+# Application-level purge of TTL-indexed collections (1-59 minutes)
+TTL_PURGE_INTERVAL_MINUTES = int(os.getenv("TTL_PURGE_INTERVAL_MINUTES", "15"))
+
+# Identity caches: verified JWTs (until they expire) and user email/role profiles
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+USER_PROFILE_CACHE_TTL_SECONDS = int(os.getenv("USER_PROFILE_CACHE_TTL_SECONDS", "60"))
+USER_PROFILE_CACHE_MAX_ENTRIES = int(os.getenv("USER_PROFILE_CACHE_MAX_ENTRIES", "10000"))
+
+# Password hashing (scrypt cost; hashes made with other parameters are upgraded on login)
+PASSWORD_SCRYPT_N = int(os.getenv("PASSWORD_SCRYPT_N", str(2 ** 14)))
+PASSWORD_SCRYPT_R = int(os.getenv("PASSWORD_SCRYPT_R", "8"))
+PASSWORD_SCRYPT_P = int(os.getenv("PASSWORD_SCRYPT_P", "1"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+
+# One-time passwords
+OTP_TTL_MINUTES = int(os.getenv("OTP_TTL_MINUTES", "5"))
+# How long a verified OTP can still be used to reset the password
+OTP_VERIFIED_TTL_MINUTES = int(os.getenv("OTP_VERIFIED_TTL_MINUTES", "10"))
+OTP_MAX_ATTEMPTS = int(os.getenv("OTP_MAX_ATTEMPTS", "5"))
+# At most OTP_RATE_LIMIT_COUNT codes per email per sliding window
+OTP_RATE_LIMIT_COUNT = int(os.getenv("OTP_RATE_LIMIT_COUNT", "3"))
+OTP_RATE_LIMIT_WINDOW_SECONDS = int(os.getenv("OTP_RATE_LIMIT_WINDOW_SECONDS", "900"))
+
+# Reference data cache (hospitals, doctors, schedules)
+REFERENCE_CACHE_TTL_SECONDS = int(os.getenv("REFERENCE_CACHE_TTL_SECONDS", "300"))
+REFERENCE_CACHE_MAX_ENTRIES = int(os.getenv("REFERENCE_CACHE_MAX_ENTRIES", "10000"))
+# Invalidate from Mongo change streams too (needs a replica set); otherwise the
+# TTL bounds staleness from writes made by other processes
+REFERENCE_CACHE_CHANGE_STREAMS = os.getenv("REFERENCE_CACHE_CHANGE_STREAMS", "false").lower() == "true"
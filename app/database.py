@@ -1,21 +1,55 @@
+from typing import Optional
+
 import certifi
 from motor.motor_asyncio import AsyncIOMotorClient
-from app.config import MONGODB_URI, DB_NAME
 
+# Built on first use: MONGODB_URI and DB_NAME are vault secrets, and
+# resolving them at import would load every secret just to import the app
+_client: Optional[AsyncIOMotorClient] = None
+
+
+def get_client() -> AsyncIOMotorClient:
+    global _client
+    if _client is None:
+        from app.config import MONGODB_URI
+
+        _client = AsyncIOMotorClient(MONGODB_URI, tlsCAFile=certifi.where())
+    return _client
+
+
+def get_collection(db_name: Optional[str] = None, collection_name: str = "demo"):
+    return get_database(db_name)[collection_name]
 
-client = AsyncIOMotorClient(MONGODB_URI, tlsCAFile=certifi.where())
+def get_database(db_name: Optional[str] = None):
+    if db_name is None:
+        from app.config import DB_NAME
 
+        db_name = DB_NAME
+    return get_client()[db_name]
 
-def get_collection(db_name: str = DB_NAME, collection_name: str = "demo"):
-    db = client[db_name]
-    return db[collection_name]
 
-def get_database(db_name: str = DB_NAME):
-    return client[db_name]
+class LazyHandle:
+    """A database or collection handle that connects on first use."""
+
+    def __init__(self, resolve):
+        self._resolve = resolve
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __getitem__(self, name):
+        return self._resolve()[name]
+
 
 # default usage (from .env)
-patients_collection = get_collection(db_name="Patient_Appointment",collection_name="Patients_Table")
-users_collection = get_collection(db_name="Patient_Appointment",collection_name="users")
-otps_collection = get_collection(db_name="Patient_Appointment",collection_name="otp_store")
-database = get_database()
+patients_collection = LazyHandle(lambda: get_collection(db_name="Patient_Appointment",collection_name="Patients_Table"))
+users_collection = LazyHandle(lambda: get_collection(db_name="Patient_Appointment",collection_name="users"))
+otps_collection = LazyHandle(lambda: get_collection(db_name="Patient_Appointment",collection_name="otp_store"))
+database = LazyHandle(get_database)
+
 
+def __getattr__(name):
+    # `client` used to be a module global
+    if name == "client":
+        return get_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,3 +1,4 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -9,111 +10,71 @@ from app.routes import hospital
 from app.routes import schedules
 from app.routes import appointments
 from app.routes import admin
+from app.routes import uploads
 from app.config import UPLOAD_DIR
 
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
 from fastapi import FastAPI
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
-import pytz
-from app.database import get_database
-from app.utils.email_service import send_email
-from datetime import datetime
+from app.utils.index_service import IndexBootstrapError, ensure_indexes, find_collscans
+from app.utils.email_service import close_email_client
+from app.utils.smtp_mailer import otp_mailer
+from app.utils.blob_storage import close_blob_client, ensure_container
+from app.utils.outbox_service import OutboxWorker
+from app.config import OUTBOX_INPROCESS_WORKER, REFERENCE_CACHE_CHANGE_STREAMS, SCHEDULER_INPROCESS
+from app.utils.reference_cache import ReferenceCache
+from app.scheduler import build_scheduler
 
 
 
 
 app = FastAPI(title="Patient API")
 
-
-async def send_daily_reminders():
-    db = get_database()
-    appointments = db.appointments
-    doctors_collection = db.doctors
-    users_collection = db.users
-
-    print("🚀 send_daily_reminders triggered")
-
-    today = datetime.now(pytz.timezone("Asia/Kolkata")).date()
-    print(f"📅 Today's date: {today}")
-
-    todays_appts = await appointments.find({
-        "start_datetime": {
-            "$gte": datetime.combine(today, datetime.min.time()),
-            "$lt": datetime.combine(today, datetime.max.time())
-        }
-    }).to_list(length=None)
-
-    print(f"📝 Found {len(todays_appts)} appointments for today")
-
-    for appt in todays_appts:
-        print(f"🔎 Appointment: {appt}")
-
-        patient_id = appt.get("patient_id")
-        doctor_id = appt.get("doctor_id")
-
-        patient = await users_collection.find_one(
-            {"_id": patient_id}, {"email": 1}
-        )
-        patient_email = patient.get("email") if patient else None
-
-        print(f"📧 Patient ID: {patient_id}, Email: {patient_email}")
-        doctor = await doctors_collection.find_one(
-            {"_id": doctor_id}, {"name": 1, "hospital": 1}
-        )
-        doctor_name = doctor.get("name", "Doctor") if doctor else doctor_id
-        doctor_hospital = doctor.get("hospital", "Unknown Hospital") if doctor else "Unknown Hospital"
-
-        print(f"👨‍⚕️ Doctor info → Name: {doctor_name}, Hospital: {doctor_hospital}")
-
-        if patient_email:
-            subject = "Appointment Reminder"
-            body_text = (
-                f"Hello,\n\nThis is a reminder for your appointment.\n"
-                f"👨‍⚕️ Doctor: {doctor_name} ({doctor_hospital})\n"
-                f"🗓 Date/Time: {appt['start_datetime']} - {appt['end_datetime']}\n"
-                f"Purpose: {appt['purpose']}\n\n"
-                "Please be on time. Thank you!"
-            )
-
-
-            body_html = f"""
-                <html>
-                <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-                    <p>Hello,</p>
-                    <p>This is a reminder for your appointment.</p>
-                    <ul>
-                    <li><b>👨‍⚕️ Doctor:</b> {doctor_name} ({doctor_hospital})</li>
-                    <li><b>🗓 Date/Time:</b> {appt['start_datetime']} - {appt['end_datetime']}</li>
-                    <li><b>Purpose:</b> {appt['purpose']}</li>
-                    </ul>
-                    <p>Please be on time. Thank you!</p>
-                </body>
-                </html>
-            """
-
-            try:
-                await send_email(patient_email, subject, body_text,body_html)
-                print(f"✅ Reminder email sent to {patient_email}")
-            except Exception as e:
-                print(f"❌ Failed to send reminder email to {patient_email}: {e}")
-        else:
-            print(f"⚠️ No email found for patient {patient_id}")
+outbox_worker = OutboxWorker() if OUTBOX_INPROCESS_WORKER else None
+scheduler = None
+reference_watch = None
 
 @app.on_event("startup")
 async def startup_event():
-    scheduler = AsyncIOScheduler()
-    print(scheduler)
-    scheduler.add_job(
-        send_daily_reminders,
-        CronTrigger(hour=7, minute=0, timezone="Asia/Kolkata")
-    )
-    print(scheduler.get_jobs())
-    scheduler.start()
+    global scheduler, reference_watch
+    try:
+        await ensure_indexes()
+        await find_collscans()
+    except IndexBootstrapError:
+        # Serving without them would silently break correctness guarantees
+        raise
+    except Exception as e:
+        print(f"❌ Index bootstrap failed: {e}")
+
+    try:
+        await ensure_container()
+    except Exception as e:
+        print(f"❌ Blob container check failed: {e}")
+
+    if outbox_worker is not None:
+        outbox_worker.start()
+
+    if REFERENCE_CACHE_CHANGE_STREAMS:
+        reference_watch = asyncio.create_task(ReferenceCache.watch_changes())
+
+    # Safe in every worker: each occurrence runs once under a Mongo lease
+    if SCHEDULER_INPROCESS:
+        scheduler = build_scheduler()
+        print(scheduler.get_jobs())
+        scheduler.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if scheduler is not None:
+        scheduler.shutdown(wait=False)
+    if reference_watch is not None:
+        reference_watch.cancel()
+    if outbox_worker is not None:
+        await outbox_worker.stop()
+    await close_email_client()
+    await otp_mailer.close()
+    await close_blob_client()
 
 # ✅ Global validation error handler
 @app.exception_handler(RequestValidationError)
@@ -153,4 +114,5 @@ app.include_router(hospital.router,prefix="/hospital",tags=["Hospital"])
 app.include_router(schedules.router,prefix="/schedules",tags=["schedule"])
 app.include_router(appointments.router,prefix="/appointments", tags=["Appointments"])
 app.include_router(admin.router, prefix="/admin", tags=["Admin"])
+app.include_router(uploads.router, prefix="/uploads", tags=["Uploads"])
 
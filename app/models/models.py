@@ -33,6 +33,31 @@ class PatientOut(BaseModel):
     insurance: Optional[InsuranceInfo] = None
     medical_records: List[FileInfo] = []
 
+class PatientListOut(BaseModel):
+    """PatientOut with every field optional, for `fields=` projections."""
+    id: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    date_of_birth: Optional[str] = None
+    gender: Optional[str] = None
+    contact_number: Optional[str] = None
+    email_address: Optional[EmailStr] = None
+    address: Optional[str] = None
+    height_cm: Optional[float] = None
+    weight_kg: Optional[float] = None
+    any_disability: Optional[bool] = None
+    allergies: Optional[str] = None
+    existing_conditions: Optional[str] = None
+    current_medications: Optional[str] = None
+    blood_group: Optional[str] = None
+    emergency_contact: Optional[EmergencyContact] = None
+    insurance: Optional[InsuranceInfo] = None
+    medical_records: Optional[List[FileInfo]] = None
+
+class PatientRecordsOut(BaseModel):
+    patient_id: str
+    medical_records: List[FileInfo] = []
+
 class AnalyticsRequest(BaseModel):
     prompt: str
     
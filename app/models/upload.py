@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class UploadInit(BaseModel):
+    filename: str
+    size: int = Field(..., gt=0, description="Total file size in bytes")
+    content_type: Optional[str] = None
+    chunk_size: Optional[int] = Field(None, gt=0, description="Defaults to UPLOAD_CHUNK_SIZE")
+    appointment_id: Optional[str] = Field(None, description="Attach the file to this appointment on commit")
+    class Config:
+        json_schema_extra = {"example": {"filename": "mri_scan.dcm", "size": 73400320, "content_type": "application/dicom"}}
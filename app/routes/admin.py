@@ -4,6 +4,9 @@ from typing import Optional
 from bson import ObjectId
 from app.database import get_database
 from ..utils.auth_utils import get_current_user, admin_required
+from ..utils.index_service import find_collscans
+from ..utils.job_service import JobRunner
+from ..utils.reference_cache import ReferenceCache
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from fastapi import Request
@@ -66,7 +69,7 @@ async def create_doctor(doctor: Doctor5, user=Depends(admin_required)):
         raise HTTPException(status_code=400, detail="Doctor with this ID already exists")
 
     # check hospital exists
-    hospital = await db.hosptials.find_one({"_id": doctor.hospital_id})
+    hospital = await ReferenceCache.get_hospital(doctor.hospital_id)
     if not hospital:
         raise HTTPException(status_code=400, detail="Hospital is Not Yet Registered")
 
@@ -75,6 +78,7 @@ async def create_doctor(doctor: Doctor5, user=Depends(admin_required)):
     doctor_data["hospital"] = hospital["name"]
 
     await db.doctors.insert_one(doctor_data)
+    ReferenceCache.invalidate_doctor(doctor.id)
     return doctor_data
 
 
@@ -89,7 +93,7 @@ async def create_receptionist(receptionist: Receptionist5, user=Depends(admin_re
         raise HTTPException(status_code=400, detail="Receptionist with this ID already exists")
 
     # check hospital exists
-    hospital = await db.hosptials.find_one({"_id": receptionist.hospital_id})
+    hospital = await ReferenceCache.get_hospital(receptionist.hospital_id)
     if not hospital:
         raise HTTPException(status_code=400, detail="Hospital is Not Yet Registered")
 
@@ -110,4 +114,19 @@ async def create_hospital(hospital: Hospital5,user=Depends(admin_required)):
     if exists:
         raise HTTPException(status_code=400, detail="Hospital with this ID already exists")
     await db.hosptials.insert_one(hospital.dict(by_alias=True))
+    ReferenceCache.invalidate_hospital(hospital.id)
     return hospital
+
+
+
+# ✅ Hot queries not served by an index
+@router.get("/indexes/collscans")
+async def get_collscan_report(user=Depends(admin_required)):
+    return {"collscans": jsonable_encoder(await find_collscans(), custom_encoder={ObjectId: str})}
+
+
+# ✅ Scheduled job run history
+@router.get("/jobs/runs")
+async def get_job_runs(job: Optional[str] = None, limit: int = 50, user=Depends(admin_required)):
+    runs = await JobRunner.history(job, min(max(limit, 1), 500))
+    return {"runs": jsonable_encoder(runs, custom_encoder={ObjectId: str})}
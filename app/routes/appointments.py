@@ -1,17 +1,31 @@
-from fastapi import APIRouter, Body,Depends,HTTPException,status
+from fastapi import APIRouter, Body,Depends,HTTPException,status,Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from pymongo import DESCENDING
 from ..utils.slot_service import SlotService
 from ..models.appointment import SlotBookingRequest
-from ..utils.auth_utils import get_current_user
-from app.database import get_database
-from ..utils.email_service import send_email
+from ..utils.auth_utils import get_current_user, get_current_identity
+from app.database import database, get_database
+from ..utils.outbox_service import enqueue_email
 from datetime import datetime
 from bson import ObjectId
 from ..utils.utils import normalize_files
+from ..utils.join_service import JoinService
+from ..utils.slot_cache import SlotCache
+from ..utils.reservation_service import ReservationService
+from ..utils.pagination import (
+    NDJSON_MEDIA_TYPE,
+    clamp_limit,
+    fetch_page,
+    iter_batches,
+    ndjson_lines,
+    open_cursor,
+)
 
 
 router = APIRouter()
 
-db = get_database()
+db = database  # resolved on first use
 @router.get("/patients/{patient_id}")
 async def get_upcoming_appointments(patient_id: str,current_user: dict = Depends(get_current_user)):
     try:
@@ -27,10 +41,14 @@ async def get_upcoming_appointments(patient_id: str,current_user: dict = Depends
 
         print(appointments_cursor)
 
+        # Resolve all referenced doctors in one query
+        doctors_by_id, _ = await JoinService.load_appointment_refs(
+            appointments_cursor, doctors_collection=doctors_collection
+        )
+
         appointments = []
         for appointment in appointments_cursor:
-            # Get doctor info
-            doctor = await doctors_collection.find_one({"_id": appointment["doctor_id"]})
+            doctor = doctors_by_id.get(appointment["doctor_id"])
             if not doctor:
                 continue  
 
@@ -61,14 +79,13 @@ async def get_upcoming_appointments(patient_id: str,current_user: dict = Depends
 @router.delete("/patients/cancel/{appointment_id}")
 async def cancel_appointment(
     appointment_id: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_identity)
 ):
     try:
         db = get_database()
-        users_collection = db.users
 
-    # Fetch patient's email from DB using current_user["_id"]
-        patient = await users_collection.find_one({"_id": ObjectId(current_user["_id"])}, {"email": 1})
+    # Patient's email comes with the identity (token claim or cached profile)
+        patient = current_user
         if not patient or "email" not in patient:
             raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -98,6 +115,11 @@ async def cancel_appointment(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Appointment not found"
             )
+        await ReservationService.release(ObjectId(appointment_id))
+        if appointment and isinstance(appointment.get("start_datetime"), datetime):
+            SlotCache.invalidate(
+                appointment["doctor_id"], appointment["start_datetime"].strftime("%Y-%m-%d")
+            )
         try:
             print(appointment,"Ujju")
             subject = "Appointment Cancellation Confirmation"
@@ -130,7 +152,7 @@ async def cancel_appointment(
                 </html>
                 """
 
-            await send_email(patient["email"], subject, body_text,body_html)
+            await enqueue_email(patient["email"], subject, body_text,body_html)
         except Exception as e:
             import logging
             logging.error(f"Failed to send confirmation email: {e}")
@@ -148,16 +170,15 @@ async def cancel_appointment(
 
 
 @router.post("/{doctor_id}/book")
-async def book_doctor_appointment(doctor_id: str, body: SlotBookingRequest,current_user: dict = Depends(get_current_user)):
+async def book_doctor_appointment(doctor_id: str, body: SlotBookingRequest,current_user: dict = Depends(get_current_identity)):
     """
     Book a slot → saves it in DB as booked.
     """
     print(current_user)
     db = get_database()
-    users_collection = db.users
 
-    # Fetch patient's email from DB using current_user["_id"]
-    patient = await users_collection.find_one({"_id": ObjectId(current_user["_id"])}, {"email": 1})
+    # Patient's email comes with the identity (token claim or cached profile)
+    patient = current_user
     if not patient or "email" not in patient:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -204,7 +225,7 @@ async def book_doctor_appointment(doctor_id: str, body: SlotBookingRequest,curre
 
 
         try:
-            await send_email(patient["email"], subject, body_text,body_html)
+            await enqueue_email(patient["email"], subject, body_text,body_html)
         except Exception as e:
             import logging
             logging.error(f"Failed to send confirmation email: {e}")
@@ -227,62 +248,108 @@ async def get_all_appointments(doctor_id: str,current_user: dict = Depends(get_c
     return await SlotService.get_all_appointments(doctor_id)
 
 
+def _ball_appointment_row(appointment: dict, doctor: dict, patient: dict) -> dict:
+    return {
+        "appointment_id": str(appointment["_id"]),
+        "start_datetime": (
+            appointment["start_datetime"].isoformat()
+            if isinstance(appointment["start_datetime"], datetime)
+            else str(appointment["start_datetime"])
+        ),
+        "end_datetime": (
+            appointment["end_datetime"].isoformat()
+            if isinstance(appointment["end_datetime"], datetime)
+            else str(appointment["end_datetime"])
+        ),
+        "date": appointment.get("date"),
+        "status": appointment.get("status"),
+        "purpose": appointment.get("purpose"),
+        "doctor": {
+            "doctor_id": str(doctor["_id"]) if doctor else None,
+            "name": doctor.get("name") if doctor else None,
+            "specialization": doctor.get("specialization") if doctor else None,
+            "hospital": doctor.get("hospital") if doctor else None,
+        },
+        "patient": {
+            "patient_id": str(patient["_id"]) if patient else None,
+            "name": patient.get("name") if patient else None,
+            "email": patient.get("email") if patient else None,
+        },
+        "medical_records": normalize_files(appointment.get("medical_records", []))
+    }
+
+
 @router.get("/ball/appointments")
-async def get_all_appointments(current_user: dict = Depends(get_current_user)):
+async def get_all_appointments(
+    limit: Optional[int] = Query(None, description="Page size; omit to fetch everything"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    stream: bool = Query(False, description="Stream rows as NDJSON"),
+    current_user: dict = Depends(get_current_user),
+):
     """
-    Fetch all appointments in the system (no filtering).
+    Fetch all appointments in the system (no filtering), latest first.
     """
     try:
-        print("hi")
         appointments_collection = db.appointments
         doctors_collection = db.doctors
         patients_collection = db.patients
-        print("hi1")
-
-        # ✅ Fetch ALL appointments
-        appointments_cursor = await appointments_collection.find({}).to_list(length=None)
 
-        appointments = []
-        for appointment in appointments_cursor:
-            # Get doctor info
-            doctor = await doctors_collection.find_one({"_id": appointment["doctor_id"]})
-            # Get patient info
-            patient = await patients_collection.find_one({"_id": appointment["patient_id"]})
+        if stream:
+            find = open_cursor(
+                appointments_collection, {}, cursor, "start_datetime", DESCENDING
+            )
+            limit = clamp_limit(limit)
+            if limit:
+                find = find.limit(limit)
+
+            async def rows():
+                async for batch in iter_batches(find):
+                    doctors_by_id, patients_by_id = await JoinService.load_appointment_refs(
+                        batch,
+                        doctors_collection=doctors_collection,
+                        patients_collection=patients_collection,
+                    )
+                    yield [
+                        _ball_appointment_row(
+                            a,
+                            doctors_by_id.get(a["doctor_id"]),
+                            patients_by_id.get(a["patient_id"]),
+                        )
+                        for a in batch
+                    ]
+
+            return StreamingResponse(ndjson_lines(rows()), media_type=NDJSON_MEDIA_TYPE)
+
+        # ✅ Fetch appointments, latest first
+        appointments_cursor, next_cursor = await fetch_page(
+            appointments_collection,
+            {},
+            limit=limit,
+            cursor=cursor,
+            sort_field="start_datetime",
+            direction=DESCENDING,
+        )
 
-            appointments.append({
-                "appointment_id": str(appointment["_id"]),
-                "start_datetime": (
-                    appointment["start_datetime"].isoformat()
-                    if isinstance(appointment["start_datetime"], datetime)
-                    else str(appointment["start_datetime"])
-                ),
-                "end_datetime": (
-                    appointment["end_datetime"].isoformat()
-                    if isinstance(appointment["end_datetime"], datetime)
-                    else str(appointment["end_datetime"])
-                ),
-                "date": appointment.get("date"),
-                "status": appointment.get("status"),
-                "purpose": appointment.get("purpose"),
-                "doctor": {
-                    "doctor_id": str(doctor["_id"]) if doctor else None,
-                    "name": doctor.get("name") if doctor else None,
-                    "specialization": doctor.get("specialization") if doctor else None,
-                    "hospital": doctor.get("hospital") if doctor else None,
-                },
-                "patient": {
-                    "patient_id": str(patient["_id"]) if patient else None,
-                    "name": patient.get("name") if patient else None,
-                    "email": patient.get("email") if patient else None,
-                },
-                "medical_records": normalize_files(appointment.get("medical_records", []))
-            })
+        # Resolve all referenced doctors and patients with one query each
+        doctors_by_id, patients_by_id = await JoinService.load_appointment_refs(
+            appointments_cursor,
+            doctors_collection=doctors_collection,
+            patients_collection=patients_collection,
+        )
 
-        # Sort by start_datetime (latest first)
-        appointments.sort(key=lambda x: x["start_datetime"], reverse=True)
+        appointments = [
+            _ball_appointment_row(
+                appointment,
+                doctors_by_id.get(appointment["doctor_id"]),
+                patients_by_id.get(appointment["patient_id"]),
+            )
+            for appointment in appointments_cursor
+        ]
 
-        return {"appointments": appointments}
+        return {"appointments": appointments, "next_cursor": next_cursor}
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -303,10 +370,14 @@ async def get_all_appointments(patient_id: str, current_user: dict = Depends(get
             "patient_id": ObjectId(patient_id)
         }).to_list(length=None)
 
+        # Resolve all referenced doctors in one query
+        doctors_by_id, _ = await JoinService.load_appointment_refs(
+            appointments_cursor, doctors_collection=doctors_collection
+        )
+
         appointments = []
         for appointment in appointments_cursor:
-            # Get doctor info
-            doctor = await doctors_collection.find_one({"_id": appointment["doctor_id"]})
+            doctor = doctors_by_id.get(appointment["doctor_id"])
             if not doctor:
                 continue  
 
@@ -1,41 +1,29 @@
-from fastapi import APIRouter, HTTPException, Depends , Body
+from fastapi import APIRouter, HTTPException, Depends , Body, Query, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from typing import Optional
 from ..models.user_model import UserCreate, UserLogin
 from app.database import users_collection
-from app.database import otps_collection
-from ..utils.auth_utils import hash_password, check_password, create_token, get_current_user
+from ..utils.auth_utils import UserProfileCache, create_token, get_current_user
+from ..utils.password_hasher import hash_password_async, password_hasher, verify_password_async
 from bson import ObjectId
-import random
-import string
-import smtplib
-from email.mime.text import MIMEText
 from datetime import datetime, timedelta
 from app.database import get_database
+from ..utils.smtp_mailer import send_otp_email
+from ..utils.otp_service import OtpService
+from app.config import OTP_TTL_MINUTES
+from ..utils.pagination import (
+    NDJSON_MEDIA_TYPE,
+    clamp_limit,
+    fetch_page,
+    iter_batches,
+    ndjson_lines,
+    open_cursor,
+)
 
 router = APIRouter()
 
 
-otp_store = {}
-
-def generate_otp():
-    return ''.join(random.choices(string.digits, k=6))
-
-def send_email(to_email: str, subject: str, body: str):
-    smtp_server = "smtp.gmail.com"
-    smtp_port = 587
-    sender_email = "ujwalsrimanth@gmail.com"
-    sender_password = "togdfcrvnauvojru"  
-
-    msg = MIMEText(body)
-    msg["Subject"] = subject
-    msg["From"] = sender_email
-    msg["To"] = to_email
-
-    with smtplib.SMTP(smtp_server, smtp_port) as server:
-        server.starttls()
-        server.login(sender_email, sender_password)
-        server.sendmail(sender_email, to_email, msg.as_string())
-
 class VerifyIDRequest(BaseModel):
     ID: str
 
@@ -55,7 +43,7 @@ async def signup(user: UserCreate):
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     user_dict = user.dict()
-    user_dict["password"] = hash_password(user.password)
+    user_dict["password"] = await hash_password_async(user.password)
     user_dict["ID"] = None if user.role == "Patient" else user.ID
     user_dict["is_profile_filled"] = False
     await users_collection.insert_one(user_dict)
@@ -65,13 +53,44 @@ async def signup(user: UserCreate):
 async def login(user: UserLogin):
     existing_user = await users_collection.find_one({"email": user.email})
     print(users_collection)
-    if not existing_user or not check_password(user.password, existing_user["password"]):
+    if not existing_user or not await verify_password_async(user.password, existing_user.get("password")):
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    token = create_token(str(existing_user["_id"]), existing_user["role"])
+    if password_hasher.needs_rehash(existing_user["password"]):
+        # Upgrade legacy SHA-256 (or outdated cost) hashes while we have the plaintext
+        await users_collection.update_one(
+            {"_id": existing_user["_id"], "password": existing_user["password"]},
+            {"$set": {"password": await hash_password_async(user.password)}},
+        )
+    token = create_token(str(existing_user["_id"]), existing_user["role"], existing_user["email"])
     return {"token": token,"email":existing_user["email"],"mobile":existing_user["mobile"],"role":existing_user["role"],"is_profile_filled":existing_user["is_profile_filled"],"id":str(existing_user["_id"])}
 
+USER_LIST_PROJECTION = {
+    "_id": 1,
+    "email": 1,
+    "mobile": 1,
+    "role": 1,
+    "ID": 1,
+    "is_profile_filled": 1
+}
+
+
+def _user_row(user: dict) -> dict:
+    return {
+        "id": str(user["_id"]),
+        "email": user.get("email"),
+        "mobile": user.get("mobile"),
+        "role": user.get("role"),
+        "ID": user.get("ID"),
+        "is_profile_filled": user.get("is_profile_filled", False)
+    }
+
+
 @router.get("/all/users")
-async def get_all_users():
+async def get_all_users(
+    limit: Optional[int] = Query(None, description="Page size; omit to fetch everything"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    stream: bool = Query(False, description="Stream users as NDJSON"),
+):
     """
     Fetch list of all users (without password).
     """
@@ -79,28 +98,30 @@ async def get_all_users():
         db = get_database()
         users_collection = db.users
 
-        users_cursor = await users_collection.find({}, {
-            "_id": 1,
-            "email": 1,
-            "mobile": 1,
-            "role": 1,
-            "ID": 1,
-            "is_profile_filled": 1
-        }).to_list(length=None)
-
-        users = []
-        for user in users_cursor:
-            users.append({
-                "id": str(user["_id"]),
-                "email": user.get("email"),
-                "mobile": user.get("mobile"),
-                "role": user.get("role"),
-                "ID": user.get("ID"),
-                "is_profile_filled": user.get("is_profile_filled", False)
-            })
-
-        return {"users": users}
-
+        if stream:
+            find = open_cursor(users_collection, {}, cursor, projection=USER_LIST_PROJECTION)
+            limit = clamp_limit(limit)
+            if limit:
+                find = find.limit(limit)
+            return StreamingResponse(
+                ndjson_lines(iter_batches(find), _user_row),
+                media_type=NDJSON_MEDIA_TYPE,
+            )
+
+        users_cursor, next_cursor = await fetch_page(
+            users_collection,
+            {},
+            limit=limit,
+            cursor=cursor,
+            projection=USER_LIST_PROJECTION,
+        )
+
+        users = [_user_row(user) for user in users_cursor]
+
+        return {"users": users, "next_cursor": next_cursor}
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -110,6 +131,7 @@ async def complete_profile(current_user: dict = Depends(get_current_user)):
         {"_id": ObjectId(current_user["_id"])},
         {"$set": {"is_profile_filled": True}}
     )
+    UserProfileCache.invalidate(current_user["_id"])
     return {"message": "Profile marked as complete"}
 
 @router.get("/get-id/{email}")
@@ -122,24 +144,16 @@ async def get_user_id(email: str,current_user: dict = Depends(get_current_user))
 
 
 @router.get("/verify-user-email")
-async def verify_user_email(email: str):
+async def verify_user_email(email: str, background_tasks: BackgroundTasks):
     existing_user = await users_collection.find_one({"email": email})
     if not existing_user:
         return {"exists": False}
 
-    otp = generate_otp()
-    expiry = datetime.utcnow() + timedelta(minutes=5)
-    await otps_collection.update_one(
-        {"email": email},
-        {"$set": {
-            "otp": otp,
-            "expiry": expiry,
-            "verified": False,
-            "created_at": datetime.utcnow()
-        }},
-        upsert=True
+    otp = await OtpService.issue(email)
+    # Delivered after the response over a pooled async SMTP session
+    background_tasks.add_task(
+        send_otp_email, email, "Your OTP Code", f"Your OTP is {otp}. It expires in {OTP_TTL_MINUTES} minutes."
     )
-    send_email(email, "Your OTP Code", f"Your OTP is {otp}. It expires in 5 minutes.")
 
     return {"exists": True, "message": "OTP sent to email"}
 
@@ -147,21 +161,10 @@ async def verify_user_email(email: str):
 async def verify_otp(payload: dict = Body(...)):
     email = payload.get("email")
     otp = payload.get("otp")
-    record = await otps_collection.find_one({"email": email})
-    if not record:
-        return {"valid": False, "message": "No OTP found"}
-
-    if datetime.utcnow() > record["expiry"]:
-        return {"valid": False, "message": "OTP expired"}
-
-    if otp != record["otp"]:
-        return {"valid": False, "message": "Invalid OTP"}
-
-    await otps_collection.update_one(
-        {"email": email},
-        {"$set": {"verified": True}}
-    )
-    return {"valid": True, "message": "OTP verified"}
+    if not isinstance(email, str) or not isinstance(otp, str) or not otp:
+        raise HTTPException(status_code=400, detail="Email and OTP are required")
+    valid, message = await OtpService.verify(email, otp)
+    return {"valid": valid, "message": message}
 
 
 
@@ -174,23 +177,20 @@ async def forgot_password(payload: dict = Body(...)):
     if not email or not new_password:
         raise HTTPException(status_code=400, detail="Email and new password are required")
 
-    otp_record = await otps_collection.find_one({"email": email})
-    if not otp_record or not otp_record.get("verified", False):
+    # Spending the verified OTP and checking it is one atomic step; only
+    # then is the (CPU-heavy) hash worth computing
+    if not await OtpService.consume_verified(email):
         raise HTTPException(status_code=400, detail="Email not verified. Please complete OTP verification first.")
 
-    existing_user = await users_collection.find_one({"email": email})
-    if not existing_user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    hashed_pw = hash_password(new_password)
-    await users_collection.update_one(
-        {"email": email},
-        {"$set": {"password": hashed_pw}}
-    )
+    hashed_pw = await hash_password_async(new_password)
 
-    await otps_collection.update_one(
+    user = await users_collection.find_one_and_update(
         {"email": email},
-        {"$set": {"verified": False}}
+        {"$set": {"password": hashed_pw}},
+        projection={"_id": 1},
     )
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    UserProfileCache.invalidate(str(user["_id"]))
 
     return {"status":True,"message": "Password reset successful"}
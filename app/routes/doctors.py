@@ -1,10 +1,11 @@
-from fastapi import APIRouter, status, Response , Depends , HTTPException
-from typing import List
+from fastapi import APIRouter, status, Response , Depends , HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
 from ..utils.doctor_service import DoctorService
 from ..models.doctors import Doctor, UpdateDoctor , Doctor1 , Receptionist
 from ..utils.slot_service import SlotService
 from ..utils.auth_utils import get_current_user
-from app.database import get_database
+from ..utils.pagination import NDJSON_MEDIA_TYPE, ndjson_lines
 from bson import ObjectId
 router = APIRouter()
 
@@ -22,48 +23,26 @@ def serialize_doc(doc):
 
 
 @router.get("/receptionist/{email}/appointments")
-async def get_hospital_schedules(email: str,current_user: dict = Depends(get_current_user)):
-    db = get_database()
-    users_collection = db.users
-    receptionist_collection = db.receptionist
-    doctors_collection = db.doctors
-    appointments_collection = db.appointments
-
-    user = await users_collection.find_one({"email": email})
-    if not user:
-        raise HTTPException(status_code=404, detail="Receptionist not found")
-
-    receptionist = await receptionist_collection.find_one({"_id": user["ID"]})
-    if not receptionist:
-        raise HTTPException(status_code=404, detail="Receptionist not found")
-    
-    hospital_id = receptionist.get("hospital_id")
-    if not hospital_id:
-        raise HTTPException(status_code=400, detail="Receptionist missing hospital_id")
-
-    # Get doctors for this hospital
-    doctors_cursor = doctors_collection.find({"hospital_id": hospital_id})
-    doctors = await doctors_cursor.to_list(length=None)
-    if not doctors:
-        return {"hospital_id": hospital_id, "appointments": []}
-
-    doctor_ids = [doc["_id"] for doc in doctors]
-
-    # Get appointments
-    appointments_cursor = appointments_collection.find({"doctor_id": {"$in": doctor_ids}})
-    appointments = await appointments_cursor.to_list(length=None)
-
-    # Add doctor name and serialize ObjectId
-    doctor_map = {str(doc["_id"]): doc.get("name") for doc in doctors}
-    serialized_appointments = []
-    for appt in appointments:
-        appt_data = serialize_doc(appt)
-        appt_data["doctor_name"] = doctor_map.get(str(appt_data["doctor_id"]), None)
-        serialized_appointments.append(appt_data)
-
-    print("bYE")
-
-    return {"hospital_id": hospital_id, "appointments": serialized_appointments}
+async def get_hospital_schedules(
+    email: str,
+    start_date: Optional[str] = Query(None, description="First day, YYYY-MM-DD"),
+    end_date: Optional[str] = Query(None, description="Last day (inclusive), YYYY-MM-DD"),
+    status_filter: Optional[List[str]] = Query(None, alias="status", description="Only these statuses; repeatable"),
+    limit: Optional[int] = Query(None, description="Page size; omit to fetch everything"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Appointments of the receptionist's hospital, oldest first, with counts per
+    doctor and status. With no filters and no `limit` every appointment is
+    returned, as before; pass start_date/end_date and `limit` for a bounded
+    dashboard page.
+    """
+    dashboard = await DoctorService.get_hospital_appointments(
+        email, start_date, end_date, status_filter, limit, cursor
+    )
+    dashboard["appointments"] = [serialize_doc(appt) for appt in dashboard["appointments"]]
+    return dashboard
 
 @router.post("/", response_model=Doctor, status_code=status.HTTP_201_CREATED)
 async def create_doctor(doctor: Doctor,current_user: dict = Depends(get_current_user)):
@@ -71,8 +50,23 @@ async def create_doctor(doctor: Doctor,current_user: dict = Depends(get_current_
 
 
 @router.get("/", response_model=List[Doctor1])
-async def list_doctors(current_user: dict = Depends(get_current_user)):
-    return await DoctorService.list_doctors()
+async def list_doctors(
+    response: Response,
+    limit: Optional[int] = Query(None, description="Page size; omit to fetch everything"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    stream: bool = Query(False, description="Stream doctors as NDJSON"),
+    current_user: dict = Depends(get_current_user),
+):
+    if stream:
+        return StreamingResponse(
+            ndjson_lines(DoctorService.stream_doctors(limit, cursor)),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    doctors, next_cursor = await DoctorService.list_doctors_page(limit, cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return doctors
 
 
 @router.get("/{id}", response_model=Doctor)
@@ -101,6 +95,25 @@ def delete_doctor(id: str):
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
+@router.get("/availability/search")
+async def search_availability(
+    start_date: str = Query(..., description="First day, YYYY-MM-DD"),
+    end_date: Optional[str] = Query(None, description="Last day (inclusive), YYYY-MM-DD"),
+    specialization: Optional[str] = Query(None),
+    hospital_id: Optional[str] = Query(None),
+    limit: int = Query(10, description="Number of slots to return"),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Earliest free slots across every doctor matching the specialization
+    and/or hospital within the date range.
+    """
+    slots = await SlotService.search_availability(
+        specialization, hospital_id, start_date, end_date, limit
+    )
+    return {"slots": slots}
+
+
 @router.get("/{doctor_id}/{date}/slots")
 async def get_doctor_slots(doctor_id: str, date: str,current_user: dict = Depends(get_current_user)):
     """
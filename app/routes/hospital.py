@@ -1,8 +1,18 @@
-from fastapi import APIRouter, status, Response, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, status, Response, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
 from ..models.hospital import Hospital
 from ..utils.auth_utils import get_current_user
 from app.database import get_database
+from ..utils.reference_cache import ReferenceCache
+from ..utils.pagination import (
+    NDJSON_MEDIA_TYPE,
+    clamp_limit,
+    fetch_page,
+    iter_batches,
+    ndjson_lines,
+    open_cursor,
+)
 
 router = APIRouter()
 
@@ -12,15 +22,40 @@ def get_hospital_collection():
     return db.hosptials
 
 @router.get("/", response_model=List[Hospital])
-async def list_hospitals(current_user: dict = Depends(get_current_user)):
+async def list_hospitals(
+    response: Response,
+    limit: Optional[int] = Query(None, description="Page size; omit to fetch everything"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    stream: bool = Query(False, description="Stream hospitals as NDJSON"),
+    current_user: dict = Depends(get_current_user),
+):
     hospitals_collection = get_hospital_collection()
-    docs = await hospitals_collection.find().to_list(length=None)
+
+    if stream:
+        find = open_cursor(hospitals_collection, {}, cursor)
+        limit = clamp_limit(limit)
+        if limit:
+            find = find.limit(limit)
+        return StreamingResponse(
+            ndjson_lines(
+                iter_batches(find),
+                lambda doc: Hospital(**doc).model_dump(by_alias=True),
+            ),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    if limit is None and cursor is None:
+        # The full list is small and rarely changes
+        return [Hospital(**doc) for doc in await ReferenceCache.get_hospitals()]
+
+    docs, next_cursor = await fetch_page(hospitals_collection, {}, limit=limit, cursor=cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return [Hospital(**doc) for doc in docs]
 
 @router.get("/{hospital_id}", response_model=Hospital)
 async def get_hospital(hospital_id: str, current_user: dict = Depends(get_current_user)):
-    hospitals_collection = get_hospital_collection()
-    doc = await hospitals_collection.find_one({"_id": hospital_id})
+    doc = await ReferenceCache.get_hospital(hospital_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Hospital not found")
     return Hospital(**doc)
@@ -1,80 +1,193 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form , Query , Depends
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form , Query , Depends, Response
 from typing import Optional, List, Any, Dict
 import os, shutil, logging
 from datetime import date
 from bson import ObjectId
 
 from app.database import patients_collection
-from app.models.models import PatientOut
+from app.models.models import PatientOut, PatientListOut, PatientRecordsOut
 from app.utils.utils import to_iso_date, normalize_files
 from app.config import UPLOAD_DIR
-from ..utils.auth_utils import get_current_user
-from app.database import get_database
+from ..utils.auth_utils import UserProfileCache, get_current_user
+from app.database import database, get_database
 from ..models.models import AnalyticsRequest
-import httpx
-from ..config import OPEN_AI_API_KEY
 import uuid
-from ..utils.email_service import send_email
+from ..utils.outbox_service import enqueue_email
+from ..utils.pagination import (
+    NDJSON_MEDIA_TYPE,
+    clamp_limit,
+    fetch_page,
+    iter_batches,
+    ndjson_lines,
+    open_cursor,
+)
 
 
 router = APIRouter()
 
-db = get_database()
+db = database  # resolved on first use
 
 from fastapi.responses import StreamingResponse
-from azure.storage.blob import BlobServiceClient
+from fastapi import Request
 import os, io
 
-# Use same connection string from app.config
-from app.config import container_client
+from ..utils.blob_storage import get_properties, open_download, upload_files
+from ..utils.streaming import etag_matches, parse_byte_range, stream_chunks
 
 @router.get("/files/{filename}")
-async def get_file(filename: str, current_user: dict = Depends(get_current_user)):
+async def get_file(filename: str, request: Request, current_user: dict = Depends(get_current_user)):
+    """
+    Stream a stored file straight from Blob Storage. Supports single
+    `Range` requests (206) and `If-None-Match` revalidation (304).
+    """
+    from azure.core.exceptions import ResourceNotFoundError
+
     try:
-        blob_client = container_client.get_blob_client(filename)
-        stream = io.BytesIO()
-        blob_data = blob_client.download_blob().readall()
-        stream.write(blob_data)
-        stream.seek(0)
-
-        # Optional: detect content type if you want proper headers
-        return StreamingResponse(stream, media_type="application/octet-stream")
-    except Exception as e:
+        props = await get_properties(filename)
+    except ResourceNotFoundError:
         raise HTTPException(status_code=404, detail=f"File {filename} not found")
 
+    size = props.size
+    headers = {"Accept-Ranges": "bytes", "ETag": props.etag}
+    media_type = (props.content_settings and props.content_settings.content_type) or "application/octet-stream"
+
+    if etag_matches(request.headers.get("if-none-match"), props.etag):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        byte_range = parse_byte_range(request.headers.get("range"), size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
 
-@router.get("/", response_model=List[PatientOut])
-async def list_patients(email_address: str = Query(None),current_user: dict = Depends(get_current_user)):
-    patients: List[PatientOut] = []
+    if size == 0:
+        return Response(content=b"", media_type=media_type, headers=headers)
 
+    if byte_range:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    else:
+        start, end = 0, size - 1
+        status_code = 200
+    headers["Content-Length"] = str(end - start + 1)
+
+    downloader = await open_download(filename, start, end - start + 1, props.etag)
+    return StreamingResponse(
+        stream_chunks(downloader), status_code=status_code, media_type=media_type, headers=headers
+    )
+
+
+# field -> how it is rendered from the stored document
+_PATIENT_FIELDS = {
+    "first_name": lambda p: p.get("first_name", ""),
+    "last_name": lambda p: p.get("last_name", ""),
+    "date_of_birth": lambda p: to_iso_date(p.get("date_of_birth")),
+    "gender": lambda p: p.get("gender", ""),
+    "contact_number": lambda p: p.get("contact_number", ""),
+    "email_address": lambda p: p.get("email_address", ""),
+    "height_cm": lambda p: p.get("height_cm"),
+    "weight_kg": lambda p: p.get("weight_kg"),
+    "any_disability": lambda p: bool(p.get("any_disability", False)),
+    "allergies": lambda p: p.get("allergies"),
+    "address": lambda p: p.get("address", ""),
+    "existing_conditions": lambda p: p.get("existing_conditions"),
+    "current_medications": lambda p: p.get("current_medications"),
+    "blood_group": lambda p: p.get("blood_group"),
+    "emergency_contact": lambda p: p.get("emergency_contact"),
+    "insurance": lambda p: p.get("insurance"),
+}
+
+
+def _patient_out(p: dict, fields=tuple(_PATIENT_FIELDS), with_records: bool = True) -> Dict[str, Any]:
+    out = {"id": str(p.get("_id", ""))}
+    for field in fields:
+        out[field] = _PATIENT_FIELDS[field](p)
+    if with_records:
+        # Signing record URLs is the expensive part; only done when asked for
+        out["medical_records"] = normalize_files(p.get("medical_records"))
+    return out
+
+
+def _parse_selection(fields: Optional[str], include: Optional[str]):
+    """
+    `fields=first_name,last_name` and `include=medical_records` ->
+    (fields, with_records, Mongo projection). With neither parameter the
+    full legacy payload is returned, records included.
+    """
+    if fields is None and include is None:
+        return tuple(_PATIENT_FIELDS), True, None
+
+    selected = [f.strip() for f in (fields or "").split(",") if f.strip()] or list(_PATIENT_FIELDS)
+    unknown = [f for f in selected if f not in _PATIENT_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+
+    includes = {i.strip() for i in (include or "").split(",") if i.strip()}
+    if includes - {"medical_records"}:
+        raise HTTPException(status_code=400, detail="include only supports medical_records")
+    with_records = "medical_records" in includes
+
+    projection = {f: 1 for f in selected}
+    if with_records:
+        projection["medical_records"] = 1
+    return tuple(selected), with_records, projection
+
+
+@router.get(
+    "/",
+    response_model=List[PatientListOut],
+    response_model_exclude_unset=True,
+)
+async def list_patients(
+    response: Response,
+    email_address: str = Query(None),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. first_name,last_name,contact_number"),
+    include: Optional[str] = Query(None, description="include=medical_records to expand records with signed URLs"),
+    limit: Optional[int] = Query(None, description="Page size; omit to fetch everything"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    stream: bool = Query(False, description="Stream patients as NDJSON"),
+    current_user: dict = Depends(get_current_user),
+):
     query = {}
     if email_address:
         query = {"email_address": email_address}
 
+    selected, with_records, projection = _parse_selection(fields, include)
 
-    async for p in patients_collection.find(query):
-        resp: Dict[str, Any] = {
-            "id": str(p.get("_id", "")),
-            "first_name": p.get("first_name", ""),
-            "last_name": p.get("last_name", ""),
-            "date_of_birth": to_iso_date(p.get("date_of_birth")),
-            "gender": p.get("gender", ""),
-            "contact_number": p.get("contact_number", ""),
-            "email_address": p.get("email_address", ""),
-            "height_cm": p.get("height_cm"),
-            "weight_kg": p.get("weight_kg"),
-            "any_disability": bool(p.get("any_disability", False)),
-            "allergies": p.get("allergies"),
-            "address": p.get("address",""),
-            "existing_conditions": p.get("existing_conditions"),
-            "current_medications": p.get("current_medications"),
-            "blood_group": p.get("blood_group"),
-            "emergency_contact": p.get("emergency_contact"),
-            "insurance": p.get("insurance"),
-            "medical_records": normalize_files(p.get("medical_records")),
-        }
-        patients.append(PatientOut(**resp))
-    return patients
+    def render(p: dict) -> PatientListOut:
+        return PatientListOut(**_patient_out(p, selected, with_records))
+
+    if stream:
+        find = open_cursor(patients_collection, query, cursor, projection=projection)
+        limit = clamp_limit(limit)
+        if limit:
+            find = find.limit(limit)
+        return StreamingResponse(
+            ndjson_lines(
+                iter_batches(find),
+                lambda p: render(p).model_dump(mode="json", exclude_unset=True),
+            ),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    docs, next_cursor = await fetch_page(
+        patients_collection, query, limit=limit, cursor=cursor, projection=projection
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    return [render(p) for p in docs]
+
+
+@router.get("/{patient_id}/records", response_model=PatientRecordsOut)
+async def get_patient_records(patient_id: str, current_user: dict = Depends(get_current_user)):
+    """A patient's medical records with signed URLs, fetched on demand."""
+    if not ObjectId.is_valid(patient_id):
+        raise HTTPException(status_code=400, detail="Invalid patient_id")
+    patient = await patients_collection.find_one({"_id": ObjectId(patient_id)}, {"medical_records": 1})
+    if not patient:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    return {"patient_id": patient_id, "medical_records": normalize_files(patient.get("medical_records"))}
 
 from fastapi import HTTPException, UploadFile, Depends
 from typing import List
@@ -95,19 +208,7 @@ async def upload_appointment_files(
         raise HTTPException(status_code=404, detail="Appointment not found")
 
     existing_files = appt.get("medical_records", [])
-    for f in files:
-        import re
-        def clean_filename(filename: str) -> str:
-            filename = filename.replace(" ", "_")
-            filename = re.sub(r"[()]", "", filename)
-            return filename
-        safe_filename = clean_filename(f.filename)
-        import uuid
-        unique_name = f"{uuid.uuid4().hex}_{safe_filename}"
-        blob_client = container_client.get_blob_client(unique_name)
-        blob_client.upload_blob(f.file, overwrite=True)
-        file_url = blob_client.url
-        existing_files.append({"filename": safe_filename, "filepath": file_url, "blob_name": unique_name})
+    existing_files.extend(await upload_files(files))
 
     await appointments_collection.update_one(
         {"_id": ObjectId(appointment_id)},
@@ -144,10 +245,10 @@ async def upload_appointment_files(
     """
 
         try:
-            await send_email(patient_email, subject, body_text, body_html)
-            print(f"✅ Notification email sent to {patient_email}")
+            await enqueue_email(patient_email, subject, body_text, body_html)
+            print(f"✅ Notification email queued for {patient_email}")
         except Exception as e:
-            print(f"❌ Failed to send notification email to {patient_email}: {e}")
+            print(f"❌ Failed to queue notification email for {patient_email}: {e}")
     else:
             print(f"⚠️ No email found for patient {patient_id} or no files uploaded")
 
@@ -212,25 +313,7 @@ async def create_patient(
 
         # Save newly uploaded files and append to existing
         if medical_records:
-            for f in medical_records:
-                # save_path = os.path.join(UPLOAD_DIR, f.filename)
-                # with open(save_path, "wb") as buf:
-                #     shutil.copyfileobj(f.file, buf)
-                # doc["medical_records"].append({"filename": f.filename, "filepath": save_path})
-                from app.config import container_client
-                import re
-                def clean_filename(filename: str) -> str:
-                    filename = filename.replace(" ", "_")
-                    filename = re.sub(r"[()]", "", filename)
-                    return filename
-                safe_filename = clean_filename(f.filename)
-                import uuid
-                unique_name = f"{uuid.uuid4().hex}_{safe_filename}"
-                blob_client = container_client.get_blob_client(unique_name)
-                blob_client.upload_blob(f.file, overwrite=True)
-
-                file_url = blob_client.url
-                doc["medical_records"].append({"filename": safe_filename, "filepath": file_url, "blob_name": unique_name})
+            doc["medical_records"].extend(await upload_files(medical_records))
 
         # Update or insert patient
         result = await patients_collection.update_one(
@@ -247,10 +330,13 @@ async def create_patient(
             "medical_records": normalize_files(patient.get("medical_records", []))
         }
 
-        await db["users"].update_one(
+        user = await db["users"].find_one_and_update(
             {"email": email_address},           # Find user by email
-                {"$set": {"is_profile_filled": True}}  # Set is_profile_filled to True
+                {"$set": {"is_profile_filled": True}},  # Set is_profile_filled to True
+            projection={"_id": 1},
         )
+        if user:
+            UserProfileCache.invalidate(str(user["_id"]))
         return PatientOut(**resp)
 
     except Exception as e:
@@ -261,11 +347,13 @@ async def create_patient(
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 import os
-import httpx
 
 
 @router.post("/api/patient-analytics")
 async def patient_analytics(request: AnalyticsRequest):
+    import httpx
+    from ..config import OPEN_AI_API_KEY
+
     try:
         async with httpx.AsyncClient() as client:
             response = await client.post(
@@ -0,0 +1,62 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from ..models.upload import UploadInit
+from ..utils.auth_utils import get_current_user
+from ..utils.upload_session_service import UploadSessionService
+from app.config import UPLOAD_MAX_CHUNK_SIZE
+
+router = APIRouter()
+
+
+@router.post("/", status_code=201)
+async def init_upload(payload: UploadInit, current_user: dict = Depends(get_current_user)):
+    """Start a resumable upload; chunks then go to PUT /uploads/{upload_id}/chunks/{index}."""
+    session = await UploadSessionService.create(
+        current_user["_id"],
+        payload.filename,
+        payload.size,
+        payload.content_type,
+        payload.chunk_size,
+        payload.appointment_id,
+    )
+    return UploadSessionService.progress(session)
+
+
+@router.get("/{upload_id}")
+async def get_upload(upload_id: str, current_user: dict = Depends(get_current_user)):
+    """Progress of an upload, including the chunks still missing (for resuming)."""
+    session = await UploadSessionService.get(upload_id, current_user["_id"])
+    return UploadSessionService.progress(session)
+
+
+@router.put("/{upload_id}/chunks/{index}")
+async def upload_chunk(upload_id: str, index: int, request: Request, current_user: dict = Depends(get_current_user)):
+    """
+    Upload one chunk as the raw request body. Chunks may be sent in any order
+    and in parallel; re-sending a chunk overwrites it.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length is None:
+        # Without it the body size is unknown until it has been read
+        raise HTTPException(status_code=411, detail="Content-Length required")
+    try:
+        length = int(content_length)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Content-Length")
+    if length < 0:
+        raise HTTPException(status_code=400, detail="Invalid Content-Length")
+    if length > UPLOAD_MAX_CHUNK_SIZE:
+        raise HTTPException(status_code=413, detail="Chunk too large")
+    data = await request.body()
+    return await UploadSessionService.upload_chunk(upload_id, index, data, current_user["_id"])
+
+
+@router.post("/{upload_id}/commit")
+async def commit_upload(upload_id: str, current_user: dict = Depends(get_current_user)):
+    """Assemble the chunks into the final file and return its medical record entry."""
+    return await UploadSessionService.commit(upload_id, current_user["_id"])
+
+
+@router.delete("/{upload_id}", status_code=204)
+async def abort_upload(upload_id: str, current_user: dict = Depends(get_current_user)):
+    await UploadSessionService.abort(upload_id, current_user["_id"])
@@ -0,0 +1,106 @@
+"""
+Scheduled jobs.
+
+Every job runs through JobRunner, so each scheduled occurrence executes
+once no matter how many API workers and replicas schedule it. To keep job
+execution off the API processes entirely, set SCHEDULER_INPROCESS=false on
+them and run this entry point instead:
+
+    python -m app.scheduler
+    python -m app.scheduler --run-now appointment_reminders   # one manual run, then exit
+"""
+import argparse
+import asyncio
+import logging
+import signal
+from datetime import datetime, timedelta, timezone
+
+from app.config import (
+    JOB_MISFIRE_GRACE_SECONDS,
+    REMINDER_INTERVAL_MINUTES,
+    SCHEDULER_TIMEZONE,
+    TTL_PURGE_INTERVAL_MINUTES,
+)
+from app.utils.email_service import close_email_client
+from app.utils.index_service import ensure_indexes, purge_expired
+from app.utils.job_service import JobRunner
+from app.utils.reminder_service import ReminderService
+
+
+async def send_appointment_reminders():
+    summary = await ReminderService.send_due_reminders()
+    if summary["due"]:
+        print(f"📝 Reminder summary: {summary}")
+    return summary
+
+
+# job name -> (coroutine function, CronTrigger fields). Cron rather than
+# interval triggers so every worker agrees on the occurrence times.
+JOBS = {
+    "appointment_reminders": (send_appointment_reminders, {"minute": f"*/{REMINDER_INTERVAL_MINUTES}"}),
+    "ttl_purge": (purge_expired, {"minute": f"*/{TTL_PURGE_INTERVAL_MINUTES}"}),
+}
+
+
+def scheduled_slot(trigger, now: datetime) -> datetime:
+    """
+    The occurrence a firing belongs to, as naive UTC. Workers whose trigger
+    fired a little late (up to the misfire grace) still agree on it, which
+    is what makes the run key in `job_runs` unique per occurrence.
+    """
+    slot = trigger.get_next_fire_time(None, now - timedelta(seconds=JOB_MISFIRE_GRACE_SECONDS))
+    return slot.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+async def run_scheduled(name: str, func, trigger):
+    now = datetime.now(trigger.timezone)
+    await JobRunner.run(name, func, scheduled_slot(trigger, now))
+
+
+def build_scheduler():
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+    from apscheduler.triggers.cron import CronTrigger
+
+    scheduler = AsyncIOScheduler(timezone=SCHEDULER_TIMEZONE)
+    for name, (func, cron) in JOBS.items():
+        trigger = CronTrigger(timezone=SCHEDULER_TIMEZONE, **cron)
+        scheduler.add_job(
+            run_scheduled,
+            trigger,
+            args=[name, func, trigger],
+            id=name,
+            misfire_grace_time=JOB_MISFIRE_GRACE_SECONDS,
+            coalesce=True,
+            max_instances=1,
+        )
+    return scheduler
+
+
+async def main(args):
+    await ensure_indexes()
+    try:
+        if args.run_now:
+            func, _ = JOBS[args.run_now]
+            run = await JobRunner.run(args.run_now, func, datetime.utcnow())
+            print(f"🗓 {args.run_now}: {run['status'] if run else 'skipped (lease held elsewhere)'}")
+            return
+
+        scheduler = build_scheduler()
+        scheduler.start()
+        print(scheduler.get_jobs())
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        await stop.wait()
+        scheduler.shutdown(wait=False)
+    finally:
+        await close_email_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the scheduled jobs")
+    parser.add_argument("--run-now", choices=sorted(JOBS), help="run one job immediately and exit")
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(parser.parse_args()))
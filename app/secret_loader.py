@@ -0,0 +1,133 @@
+"""
+Startup secret loading.
+
+Secrets are resolved in this order:
+1. the process environment (handy for local runs and CI)
+2. an encrypted local cache file, if SECRET_CACHE_KEY is set and the cache
+   is younger than SECRET_CACHE_TTL_SECONDS
+3. the vault, with all missing secrets fetched concurrently
+
+VAULT_URL is either an Azure Key Vault URL or `file://<path>` for a local
+stand-in vault: a JSON object of secret name -> value, with an optional
+LOCAL_VAULT_LATENCY_MS per lookup to mimic network round trips.
+"""
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LocalVault:
+    """Stand-in for SecretClient backed by a JSON file."""
+
+    class _Secret:
+        def __init__(self, value: str):
+            self.value = value
+
+    def __init__(self, path: str, latency_ms: float = 0):
+        with open(path) as f:
+            self._secrets = json.load(f)
+        self.latency = latency_ms / 1000
+
+    def get_secret(self, name: str) -> "_Secret":
+        if self.latency:
+            time.sleep(self.latency)
+        if name not in self._secrets:
+            raise KeyError(f"Secret {name} not found in local vault")
+        return self._Secret(self._secrets[name])
+
+
+def make_vault_client(vault_url: str):
+    if vault_url.startswith("file://"):
+        return LocalVault(vault_url[len("file://"):], float(os.getenv("LOCAL_VAULT_LATENCY_MS", "0")))
+
+    # Imported here so runs served from the env or the cache skip the Azure SDK
+    from azure.identity import DefaultAzureCredential
+    from azure.keyvault.secrets import SecretClient
+
+    return SecretClient(vault_url=vault_url, credential=DefaultAzureCredential())
+
+
+def fetch_secrets(client, names: Dict[str, str], concurrency: int = 16) -> Dict[str, str]:
+    """Fetch vault secrets concurrently; `names` maps setting -> vault secret name."""
+    if not names:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(names))) as pool:
+        futures = {setting: pool.submit(client.get_secret, secret) for setting, secret in names.items()}
+        return {setting: future.result().value for setting, future in futures.items()}
+
+
+class SecretCache:
+    """Fernet-encrypted JSON file holding the last fetched secrets."""
+
+    def __init__(self, path: str, key: Optional[str], ttl_seconds: int):
+        self.path = path
+        self.ttl = ttl_seconds
+        self._fernet = None
+        if key and ttl_seconds > 0:
+            from cryptography.fernet import Fernet
+
+            self._fernet = Fernet(key.encode())
+
+    @property
+    def enabled(self) -> bool:
+        return self._fernet is not None
+
+    def load(self, vault_url: str) -> Dict[str, str]:
+        if not self.enabled or not os.path.exists(self.path):
+            return {}
+        try:
+            from cryptography.fernet import InvalidToken
+
+            with open(self.path, "rb") as f:
+                raw = self._fernet.decrypt(f.read(), ttl=self.ttl)
+        except (InvalidToken, OSError):
+            # Expired, tampered with or written under another key
+            return {}
+        payload = json.loads(raw)
+        if payload.get("vault_url") != vault_url:
+            return {}
+        return payload.get("secrets", {})
+
+    def save(self, vault_url: str, secrets: Dict[str, str]) -> None:
+        if not self.enabled:
+            return
+        token = self._fernet.encrypt(json.dumps({"vault_url": vault_url, "secrets": secrets}).encode())
+        tmp_path = self.path + ".tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(token)
+        os.replace(tmp_path, self.path)
+
+
+def load_secrets(
+    names: Dict[str, str],
+    vault_url: Optional[str],
+    cache: Optional[SecretCache] = None,
+    client=None,
+) -> Dict[str, str]:
+    secrets = {setting: os.environ[setting] for setting in names if os.getenv(setting)}
+    missing = {setting: secret for setting, secret in names.items() if setting not in secrets}
+    if not missing:
+        return secrets
+
+    if cache is not None and vault_url:
+        cached = cache.load(vault_url)
+        if all(setting in cached for setting in missing):
+            secrets.update({setting: cached[setting] for setting in missing})
+            return secrets
+
+    if not vault_url:
+        raise Exception("❌ VAULT_URL not set for production")
+
+    start = time.perf_counter()
+    fetched = fetch_secrets(client or make_vault_client(vault_url), missing)
+    logger.info("Fetched %d secrets in %.2fs", len(fetched), time.perf_counter() - start)
+    if cache is not None:
+        cache.save(vault_url, fetched)
+    secrets.update(fetched)
+    return secrets
@@ -1,34 +1,63 @@
 import hashlib
 import jwt
 import os
+import time
 from datetime import datetime, timedelta
+from typing import Optional
+from bson import ObjectId
+from cachetools import LRUCache, TTLCache
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 
+from app.config import TOKEN_CACHE_MAX_ENTRIES, USER_PROFILE_CACHE_MAX_ENTRIES, USER_PROFILE_CACHE_TTL_SECONDS
+from app.database import get_database
+from .password_hasher import password_hasher
+
 load_dotenv()
 JWT_SECRET = os.getenv("JWT_SECRET")
 
 security = HTTPBearer()
 
+# Blocking variants; request handlers use hash_password_async / verify_password_async
 def hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode()).hexdigest()
+    return password_hasher.hash(password)
 
 def check_password(plain: str, hashed: str) -> bool:
-    return hash_password(plain) == hashed
+    return password_hasher.verify(plain, hashed)
 
-def create_token(user_id: str, role: str):
+def create_token(user_id: str, role: str, email: Optional[str] = None):
     payload = {
         "_id": user_id,
         "role": role,
         "exp": datetime.utcnow() + timedelta(days=1)
     }
+    if email:
+        payload["email"] = email
     return jwt.encode(payload, JWT_SECRET, algorithm="HS256")
 
+# sha256(token) -> verified claims; entries are dropped once the token expires
+_token_cache: LRUCache = LRUCache(maxsize=TOKEN_CACHE_MAX_ENTRIES)
+
+def decode_token(token: str) -> dict:
+    """jwt.decode with a cache of already verified tokens."""
+    key = hashlib.sha256(token.encode()).digest()
+    claims = _token_cache.get(key)
+    if claims is not None:
+        if claims["exp"] > time.time():
+            return dict(claims)
+        _token_cache.pop(key, None)
+        raise jwt.ExpiredSignatureError("Signature has expired")
+
+    claims = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
+    if "exp" in claims:
+        _token_cache[key] = claims
+    return dict(claims)
+
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
         token = credentials.credentials
-        decoded = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
+        decoded = decode_token(token)
         return decoded
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
@@ -38,4 +67,43 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
 def admin_required(user=Depends(get_current_user)):
     if user.get("role") != "Admin":
         raise HTTPException(status_code=403, detail="Admins only")
-    return user
\ No newline at end of file
+    return user
+
+class UserProfileCache:
+    """
+    Short-TTL cache of each user's email and role, keyed by user id. Writes
+    to a user document call `invalidate`; any other change (e.g. made
+    directly in the database) is visible after at most
+    USER_PROFILE_CACHE_TTL_SECONDS.
+    """
+
+    _profiles: TTLCache = TTLCache(maxsize=USER_PROFILE_CACHE_MAX_ENTRIES, ttl=USER_PROFILE_CACHE_TTL_SECONDS)
+
+    @classmethod
+    async def get(cls, user_id: str) -> Optional[dict]:
+        profile = cls._profiles.get(user_id)
+        if profile is None:
+            if not ObjectId.is_valid(user_id):
+                return None
+            user = await get_database().users.find_one({"_id": ObjectId(user_id)}, {"email": 1, "role": 1})
+            if not user:
+                return None
+            profile = {"email": user.get("email"), "role": user.get("role")}
+            cls._profiles[user_id] = profile
+        return profile
+
+    @classmethod
+    def invalidate(cls, user_id: str) -> None:
+        cls._profiles.pop(user_id, None)
+
+async def get_current_identity(user=Depends(get_current_user)):
+    """
+    get_current_user plus the user's email. Tokens issued at login carry the
+    email already; older tokens fall back to the cached profile.
+    """
+    if user.get("email"):
+        return user
+    profile = await UserProfileCache.get(user["_id"])
+    if not profile or not profile.get("email"):
+        raise HTTPException(status_code=404, detail="Patient email not found")
+    return {**user, **profile}
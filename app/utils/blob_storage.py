@@ -0,0 +1,136 @@
+import logging
+import os
+import re
+import uuid
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional
+
+from fastapi import UploadFile
+
+from app.config import (
+    BLOB_DOWNLOAD_CHUNK_SIZE,
+    BLOB_UPLOAD_CONCURRENCY,
+    BLOB_UPLOAD_READ_SIZE,
+)
+from .dispatch import run_bounded
+
+if TYPE_CHECKING:
+    from azure.storage.blob import BlobProperties
+    from azure.storage.blob.aio import BlobServiceClient, ContainerClient, StorageStreamDownloader
+
+logger = logging.getLogger(__name__)
+
+# One async client per process: every request shares its connection pool
+_blob_service_client: Optional["BlobServiceClient"] = None
+
+
+def get_container_client() -> "ContainerClient":
+    # Secrets are resolved here rather than at import (see app.config)
+    from app.config import AZURE_CONTAINER_NAME, AZURE_STORAGE_CONNECTION_STRING
+
+    global _blob_service_client
+    if _blob_service_client is None:
+        # The storage SDK is imported on first use, not at app start
+        from azure.storage.blob.aio import BlobServiceClient
+
+        _blob_service_client = BlobServiceClient.from_connection_string(
+            AZURE_STORAGE_CONNECTION_STRING,
+            # Downloads are fetched (and streamed to the client) in chunks of this size
+            max_single_get_size=BLOB_DOWNLOAD_CHUNK_SIZE,
+            max_chunk_get_size=BLOB_DOWNLOAD_CHUNK_SIZE,
+        )
+    return _blob_service_client.get_container_client(AZURE_CONTAINER_NAME)
+
+
+async def ensure_container() -> None:
+    """Create the records container if it does not exist yet (run once at startup)."""
+    from azure.core.exceptions import ResourceExistsError
+
+    try:
+        await get_container_client().create_container()
+    except ResourceExistsError:
+        pass
+
+
+async def close_blob_client():
+    global _blob_service_client
+    if _blob_service_client is not None:
+        await _blob_service_client.close()
+        _blob_service_client = None
+
+
+def clean_filename(filename: str) -> str:
+    # Keep only the final path component so names can never climb out of
+    # the upload directory, then allow a conservative character set
+    filename = os.path.basename(filename.replace("\\", "/"))
+    filename = filename.replace(" ", "_")
+    filename = re.sub(r"[()]", "", filename)
+    filename = re.sub(r"[^A-Za-z0-9._-]", "_", filename).lstrip(".")
+    return filename or "file"
+
+
+async def _read_chunks(upload: UploadFile) -> AsyncIterator[bytes]:
+    # UploadFile.read runs in a worker thread, so the spooled temp file is
+    # never read on the event loop
+    while True:
+        chunk = await upload.read(BLOB_UPLOAD_READ_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def upload_file(upload: UploadFile) -> Dict[str, str]:
+    """Upload one file under a unique blob name and return its medical record entry."""
+    safe_filename = clean_filename(upload.filename)
+    unique_name = f"{uuid.uuid4().hex}_{safe_filename}"
+    blob_client = get_container_client().get_blob_client(unique_name)
+    await blob_client.upload_blob(_read_chunks(upload), overwrite=True)
+    return {"filename": safe_filename, "filepath": blob_client.url, "blob_name": unique_name}
+
+
+async def delete_blob(blob_name: str) -> None:
+    from azure.core.exceptions import ResourceNotFoundError
+
+    try:
+        await get_container_client().delete_blob(blob_name, delete_snapshots="include")
+    except ResourceNotFoundError:
+        pass
+
+
+async def upload_files(uploads: List[UploadFile]) -> List[Dict[str, str]]:
+    """
+    Upload several files concurrently, all or nothing: if any upload fails,
+    the blobs that did upload are deleted and the first failure is raised,
+    so no blob is left without a medical record pointing at it.
+    """
+    results = await run_bounded(uploads, upload_file, BLOB_UPLOAD_CONCURRENCY)
+    errors = [result for result in results if isinstance(result, Exception)]
+    if not errors:
+        return results
+
+    uploaded = [result["blob_name"] for result in results if not isinstance(result, Exception)]
+    cleanup = await run_bounded(uploaded, delete_blob, BLOB_UPLOAD_CONCURRENCY)
+    for blob_name, outcome in zip(uploaded, cleanup):
+        if isinstance(outcome, Exception):
+            logger.error("Failed to delete orphaned blob %s: %s", blob_name, outcome)
+    raise errors[0]
+
+
+async def get_properties(blob_name: str) -> "BlobProperties":
+    return await get_container_client().get_blob_client(blob_name).get_blob_properties()
+
+
+async def open_download(
+    blob_name: str, offset: int, length: int, etag: Optional[str] = None
+) -> "StorageStreamDownloader":
+    """
+    Start a ranged download. Passing the `etag` from `get_properties` makes
+    the download fail instead of mixing bytes from two blob versions.
+    """
+    from azure.core import MatchConditions
+
+    kwargs = {}
+    if etag:
+        kwargs = {"etag": etag, "match_condition": MatchConditions.IfNotModified}
+    return await get_container_client().get_blob_client(blob_name).download_blob(
+        offset=offset, length=length, **kwargs
+    )
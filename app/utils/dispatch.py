@@ -0,0 +1,51 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Iterable, List, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class RateLimiter:
+    """
+    Spaces out operations so that at most `rate_per_second` start per second.
+    A rate of 0 (or less) disables limiting.
+    """
+
+    def __init__(self, rate_per_second: float):
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def run_bounded(
+    items: Iterable[T],
+    worker: Callable[[T], Awaitable[R]],
+    concurrency: int,
+    rate_limiter: Optional[RateLimiter] = None,
+) -> List[R]:
+    """
+    Run `worker` over `items` with at most `concurrency` calls in flight,
+    optionally throttled by `rate_limiter`. Results are returned in input
+    order; exceptions are returned in place of results instead of being
+    raised, so one failure does not cancel the rest.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def _run(item: T):
+        async with semaphore:
+            if rate_limiter is not None:
+                await rate_limiter.wait()
+            return await worker(item)
+
+    return await asyncio.gather(*(_run(item) for item in items), return_exceptions=True)
@@ -1,10 +1,13 @@
+import asyncio
 from fastapi import HTTPException, status, Response
 from bson import ObjectId
-from typing import List
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from httpx import get
 from ..models.doctors import Doctor, UpdateDoctor ,Doctor1 , Receptionist
 from app.database import get_database
+from .pagination import clamp_limit, encode_cursor, fetch_page, iter_batches, keyset_filter, sort_spec
+from .reference_cache import ReferenceCache
 
 
 def serialize_doc(doc: dict) -> dict:
@@ -27,38 +30,87 @@ class DoctorService:
             return Doctor(**created_doctor)
         raise HTTPException(status_code=500, detail="Failed to create doctor.")
 
-    @staticmethod
-    async def list_doctors() -> List[Doctor1]:
-        db = get_database()
-        print("hi")
-        doctors_collection = db.doctors
-        schedules_collection = db.schedules
-        docs = await doctors_collection.find().to_list(length=None)
+    # Sets `registered` from at most one matching schedule per doctor, so
+    # only the schedules of the doctors actually returned are read
+    REGISTERED_STAGES = [
+        {
+            "$lookup": {
+                "from": "schedules",
+                "let": {"doctor_id": "$_id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$doctor_id", "$$doctor_id"]}}},
+                    {"$limit": 1},
+                    {"$project": {"_id": 1}},
+                ],
+                "as": "_schedules",
+            }
+        },
+        {"$addFields": {"registered": {"$gt": [{"$size": "$_schedules"}, 0]}}},
+        {"$project": {"_schedules": 0}},
+    ]
+
+    @classmethod
+    def _doctors_pipeline(
+        cls, query: dict, cursor: Optional[str] = None, limit: Optional[int] = None
+    ) -> List[dict]:
+        pipeline = [
+            {"$match": keyset_filter(query, cursor)},
+            {"$sort": dict(sort_spec())},
+        ]
+        if limit:
+            pipeline.append({"$limit": limit})
+        return pipeline + cls.REGISTERED_STAGES
 
-        # 2️⃣ Fetch all doctor_ids present in schedules
-        schedules = await schedules_collection.find({}, {"doctor_id": 1}).to_list(length=None)
-        print(schedules)
-        registered_ids = {sched["doctor_id"] for sched in schedules}  
+    @staticmethod
+    def _to_doctor1(doc: dict) -> Doctor1:
+        doc_data = serialize_doc(doc)
+        doc_data["registered"] = doc_data.get("registered", False)
+        return Doctor1(**doc_data)
+
+    @classmethod
+    async def list_doctors_page(
+        cls, limit: Optional[int] = None, cursor: Optional[str] = None
+    ) -> Tuple[List[Doctor1], Optional[str]]:
+        """
+        One keyset page of doctors ordered by `_id`, plus the cursor for the
+        next page (None on the last page).
+        """
+        doctors_collection = get_database().doctors
+        limit = clamp_limit(limit)
 
-        # 3️⃣ Add registered field
-        doctor_list = []
-        for doc in docs:
-            doc_data = serialize_doc(doc)
-            doc_data["registered"] = doc_data["_id"] in registered_ids
-            doctor_list.append(Doctor1(**doc_data))
+        # Read one extra document to know whether another page exists
+        pipeline = cls._doctors_pipeline({}, cursor, limit + 1 if limit else None)
+        docs = await doctors_collection.aggregate(pipeline).to_list(length=None)
 
+        next_cursor = None
+        if limit and len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = encode_cursor(None, docs[-1]["_id"])
+        return [cls._to_doctor1(doc) for doc in docs], next_cursor
 
+    @classmethod
+    async def list_doctors(cls) -> List[Doctor1]:
+        doctor_list, _ = await cls.list_doctors_page()
         return doctor_list
-    
-    @staticmethod
-    @staticmethod
-    async def get_doctors_by_hospital(hospital_id: str) -> List[Doctor1]:
-        db = get_database()
-        doctors_collection = db.doctors
-        schedules_collection = db.schedules
 
-        # 1️⃣ Get doctors for the hospital
-        doctors = await doctors_collection.find({"hospital_id": hospital_id}).to_list(length=None)
+    @classmethod
+    async def stream_doctors(
+        cls, limit: Optional[int] = None, cursor: Optional[str] = None
+    ) -> AsyncIterator[List[dict]]:
+        """Yield batches of serialized doctors as they arrive from the cursor."""
+        doctors_collection = get_database().doctors
+        pipeline = cls._doctors_pipeline({}, cursor, clamp_limit(limit))
+
+        async for batch in iter_batches(doctors_collection.aggregate(pipeline)):
+            yield [cls._to_doctor1(doc).model_dump(by_alias=True) for doc in batch]
+
+    @classmethod
+    async def get_doctors_by_hospital(cls, hospital_id: str) -> List[Doctor1]:
+        doctors_collection = get_database().doctors
+
+        # Doctors for the hospital, each with its registered flag
+        pipeline = cls._doctors_pipeline({"hospital_id": hospital_id})
+        doctors = await doctors_collection.aggregate(pipeline).to_list(length=None)
 
         if not doctors:
             raise HTTPException(
@@ -66,22 +118,111 @@ class DoctorService:
                 detail=f"No doctors found for hospital ID '{hospital_id}'.",
             )
 
-        # 2️⃣ Fetch doctor_ids from schedules
-        schedules = await schedules_collection.find({}, {"doctor_id": 1}).to_list(length=None)
-        registered_ids = {sched["doctor_id"] for sched in schedules}
-        print(registered_ids)
-
-        # 3️⃣ Add registered field
-        doctor_list = []
-        for doc in doctors:
-            doc_data = serialize_doc(doc)
-            doc_data["registered"] = doc_data["_id"] in registered_ids
-            doctor_list.append(Doctor1(**doc_data))
-        print(doctor_list)
+        return [cls._to_doctor1(doc) for doc in doctors]
 
-        return doctor_list
+    @staticmethod
+    async def get_hospital_appointments(
+        email: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        statuses: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Appointments of every doctor in the hospital of the receptionist
+        logged in as `email`, ordered by start time, plus appointment counts
+        per doctor and status over the whole filtered range.
+
+        user -> receptionist -> doctors is resolved with three small indexed
+        lookups; appointments and counts are then read through the
+        (doctor_id, start_datetime) index. Without `limit` (or `cursor`) every
+        matching appointment is returned, as before; with it, one keyset page
+        and `next_cursor`.
+        """
+        try:
+            first_day = datetime.strptime(start_date, "%Y-%m-%d") if start_date else None
+            last_day = datetime.strptime(end_date, "%Y-%m-%d") if end_date else None
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Incorrect date format, should be YYYY-MM-DD",
+            )
+        if first_day and last_day and last_day < first_day:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="end_date must not be before start_date",
+            )
+        appointment_query: Dict[str, Any] = {}
+        if first_day or last_day:
+            appointment_query["start_datetime"] = {}
+            if first_day:
+                appointment_query["start_datetime"]["$gte"] = first_day
+            if last_day:
+                # end_date is inclusive
+                appointment_query["start_datetime"]["$lt"] = last_day + timedelta(days=1)
+        if statuses:
+            appointment_query["status"] = {"$in": statuses}
 
-    
+        db = get_database()
+        user = await db.users.find_one({"email": email}, {"ID": 1})
+        receptionist = await db.receptionist.find_one({"_id": user.get("ID")}, {"hospital_id": 1}) if user else None
+        if not receptionist:
+            raise HTTPException(status_code=404, detail="Receptionist not found")
+
+        hospital_id = receptionist.get("hospital_id")
+        if not hospital_id:
+            raise HTTPException(status_code=400, detail="Receptionist missing hospital_id")
+        doctors = await db.doctors.find({"hospital_id": hospital_id}, {"name": 1}).to_list(length=None)
+        if not doctors:
+            return {"hospital_id": hospital_id, "appointments": [], "doctor_counts": [], "next_cursor": None}
+
+        # A top-level $in on doctor_id keeps both queries on the
+        # (doctor_id, start_datetime) index
+        match = {"doctor_id": {"$in": [doc["_id"] for doc in doctors]}, **appointment_query}
+        counts_pipeline = [
+            {"$match": match},
+            {
+                "$group": {
+                    "_id": {"doctor_id": "$doctor_id", "status": {"$ifNull": ["$status", "unknown"]}},
+                    "count": {"$sum": 1},
+                }
+            },
+            {
+                "$group": {
+                    "_id": "$_id.doctor_id",
+                    "total": {"$sum": "$count"},
+                    "by_status": {"$push": {"k": "$_id.status", "v": "$count"}},
+                }
+            },
+            {"$addFields": {"by_status": {"$arrayToObject": "$by_status"}}},
+        ]
+        (appointments, next_cursor), counts = await asyncio.gather(
+            fetch_page(db.appointments, match, limit=limit, cursor=cursor, sort_field="start_datetime"),
+            db.appointments.aggregate(counts_pipeline).to_list(length=None),
+        )
+        counts_by_doctor = {c["_id"]: c for c in counts}
+
+        doctor_names = {doc["_id"]: doc.get("name") for doc in doctors}
+        for appt in appointments:
+            appt["doctor_name"] = doctor_names.get(appt.get("doctor_id"))
+
+        doctor_counts = [
+            {
+                "doctor_id": doctor_id,
+                "doctor_name": name,
+                "total": counts_by_doctor.get(doctor_id, {}).get("total", 0),
+                "by_status": counts_by_doctor.get(doctor_id, {}).get("by_status", {}),
+            }
+            for doctor_id, name in doctor_names.items()
+        ]
+
+        return {
+            "hospital_id": hospital_id,
+            "appointments": appointments,
+            "doctor_counts": doctor_counts,
+            "next_cursor": next_cursor,
+        }
 
     @staticmethod
     async def get_receptionist(id: str) -> Receptionist:
@@ -103,14 +244,12 @@ class DoctorService:
 
     @staticmethod
     async def get_doctor(id: str) -> Doctor:
-        doctors_collection = get_database().doctors
-
         # Validate format (starts with "DOC")
         if not id.startswith("DOC"):
             raise HTTPException(status_code=400, detail="Invalid Doctor ID format.")
 
-        # Query by _id (which is a string)
-        doctor = await doctors_collection.find_one({"_id": id})
+        # Query by _id (which is a string), through the reference cache
+        doctor = await ReferenceCache.get_doctor(id)
         if doctor:
             return Doctor(**serialize_doc(doctor))
         raise HTTPException(status_code=404, detail="Doctor not found. Please Enter a Different ID or Contact the Hospital Administration")
@@ -133,6 +272,7 @@ class DoctorService:
         if not updated_doctor:
             raise HTTPException(status_code=404, detail="Doctor not found.")
 
+        ReferenceCache.invalidate_doctor(id)
         return Doctor(**serialize_doc(updated_doctor))
 
     @staticmethod
@@ -143,6 +283,7 @@ class DoctorService:
             raise HTTPException(status_code=400, detail="Invalid Doctor ID format.")
 
         delete_result = await doctors_collection.delete_one({"_id": id})
+        ReferenceCache.invalidate_doctor(id)
         if delete_result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Doctor not found.")
 
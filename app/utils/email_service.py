@@ -1,31 +1,110 @@
-from azure.communication.email.aio import EmailClient
+import asyncio
+import logging
 import os
-from app.config import ACS_CONNECTION_STRING, SENDER_ADDRESS
+import random
+from typing import TYPE_CHECKING, List, Optional
+from app.config import EMAIL_SENDER
 
-async def send_email(recipient_email: str, subject: str, body: str,body_html: str = None):
+if TYPE_CHECKING:
+    from azure.communication.email.aio import EmailClient
+
+logger = logging.getLogger(__name__)
+
+# One client per process so the underlying HTTP connection pool is reused
+_email_client: Optional["EmailClient"] = None
+
+
+def get_email_client() -> "EmailClient":
+    global _email_client
+    if _email_client is None:
+        # The ACS SDK is imported on first send, not at app start
+        from azure.communication.email.aio import EmailClient
+        from app.config import ACS_CONNECTION_STRING
+
+        if not ACS_CONNECTION_STRING:
+            raise ValueError("ACS_CONNECTION_STRING not set in environment variables")
+        _email_client = EmailClient.from_connection_string(ACS_CONNECTION_STRING)
+    return _email_client
 
-    print(recipient_email)
-    if not ACS_CONNECTION_STRING:
-        raise ValueError("ACS_CONNECTION_STRING not set in environment variables")
 
-    email_client = EmailClient.from_connection_string(ACS_CONNECTION_STRING)
+async def close_email_client():
+    global _email_client
+    if _email_client is not None:
+        await _email_client.close()
+        _email_client = None
+
+
+def _build_message(recipients: List[str], subject: str, body: str, body_html: str = None) -> dict:
+    from app.config import SENDER_ADDRESS
+
+    if len(recipients) == 1:
+        to, bcc = [{"address": recipients[0]}], []
+    else:
+        # Batched recipients must not see each other
+        to, bcc = [{"address": SENDER_ADDRESS}], [{"address": r} for r in recipients]
 
     message = {
         "senderAddress": SENDER_ADDRESS,  # your ACS subdomain sender
-        "recipients": {
-            "to": [{"address": recipient_email}]
-        },
+        "recipients": {"to": to},
         "content": {
             "subject": subject,
             "plainText": body,
             "html": body_html
         }
     }
-    try:
-        poller = await email_client.begin_send(message)
-        result = await poller.result()
-        print(result)
-    finally:
-        await email_client.close() 
+    if bcc:
+        message["recipients"]["bcc"] = bcc
+    return message
 
+
+async def send_bulk_email(recipients: List[str], subject: str, body: str, body_html: str = None):
+    """Send one message to every address in `recipients` (Bcc when more than one)."""
+    poller = await get_email_client().begin_send(_build_message(recipients, subject, body, body_html))
+    result = await poller.result()
+    logger.debug("Sent %r to %d recipients", subject, len(recipients))
     return result
+
+
+async def send_email(recipient_email: str, subject: str, body: str,body_html: str = None):
+    return await send_bulk_email([recipient_email], subject, body, body_html)
+
+
+class AcsEmailSender:
+    """Delivers through Azure Communication Services using the pooled client."""
+
+    async def send(self, recipients: List[str], subject: str, body: str, body_html: str = None):
+        return await send_bulk_email(recipients, subject, body, body_html)
+
+
+class FakeEmailSender:
+    """
+    Offline stand-in for ACS. Records every message in `sent` after an
+    optional delay and fails a `failure_rate` fraction of sends, so the
+    outbox retry path can be exercised without network access.
+    """
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.sent: List[dict] = []
+
+    async def send(self, recipients: List[str], subject: str, body: str, body_html: str = None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise RuntimeError("FakeEmailSender: simulated delivery failure")
+        message = _build_message(recipients, subject, body, body_html)
+        self.sent.append(message)
+        logger.info("FakeEmailSender: %r to %s", subject, recipients)
+        return {"status": "Succeeded"}
+
+
+def get_email_sender(kind: str = None):
+    """Sender selected by `kind` or the EMAIL_SENDER setting ("acs" / "fake")."""
+    kind = (kind or EMAIL_SENDER).lower()
+    if kind == "fake":
+        return FakeEmailSender(
+            latency=float(os.getenv("FAKE_EMAIL_LATENCY_SECONDS", "0")),
+            failure_rate=float(os.getenv("FAKE_EMAIL_FAILURE_RATE", "0")),
+        )
+    return AcsEmailSender()
@@ -0,0 +1,213 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from app.database import get_database
+
+logger = logging.getLogger(__name__)
+
+
+# collection name -> indexes the app relies on
+INDEX_REGISTRY: Dict[str, List[IndexModel]] = {
+    "appointments": [
+        # SlotService.get_slots / book_slot overlap checks
+        IndexModel(
+            [("doctor_id", ASCENDING), ("start_datetime", ASCENDING), ("end_datetime", ASCENDING)],
+            name="doctor_start_end",
+        ),
+        # patient appointment routes
+        IndexModel(
+            [("patient_id", ASCENDING), ("start_datetime", ASCENDING)],
+            name="patient_start",
+        ),
+        # /ball/appointments keyset pagination
+        IndexModel(
+            [("start_datetime", DESCENDING), ("_id", DESCENDING)],
+            name="start_desc_id_desc",
+        ),
+        # ReminderService: appointments starting soon that were not reminded yet
+        IndexModel(
+            [("start_datetime", ASCENDING), ("reminder_sent_at", ASCENDING)],
+            name="start_reminder",
+        ),
+    ],
+    "slot_reservations": [
+        # `_id` (<doctor_id>|<slot start>) is the uniqueness guard itself
+        IndexModel([("appointment_id", ASCENDING)], name="appointment_id"),
+        # past reservations can no longer conflict with anything
+        IndexModel([("slot_start", ASCENDING)], name="slot_start_ttl", expireAfterSeconds=7 * 24 * 3600),
+    ],
+    "schedules": [
+        IndexModel([("doctor_id", ASCENDING)], name="doctor_id"),
+    ],
+    "email_outbox": [
+        # OutboxService.claim_batch
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next_attempt"),
+        IndexModel([("status", ASCENDING), ("locked_until", ASCENDING)], name="status_locked_until"),
+        IndexModel([("claim_id", ASCENDING)], name="claim_id"),
+        # delivered messages are kept for 30 days for auditing
+        IndexModel([("sent_at", ASCENDING)], name="sent_at_ttl", expireAfterSeconds=30 * 24 * 3600),
+    ],
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "otp_store": [
+        # OtpService relies on one document per email
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("purge_at", ASCENDING)], name="purge_at_ttl", expireAfterSeconds=0),
+    ],
+    "doctors": [
+        IndexModel([("hospital_id", ASCENDING)], name="hospital_id"),
+    ],
+    "job_runs": [
+        # run history per job, kept for 90 days
+        IndexModel([("job", ASCENDING), ("started_at", DESCENDING)], name="job_started_desc"),
+        IndexModel([("started_at", ASCENDING)], name="started_at_ttl", expireAfterSeconds=90 * 24 * 3600),
+    ],
+    "upload_sessions": [
+        # abandoned resumable uploads
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+
+# collection name -> representative filters of the hot queries, used by
+# `find_collscans` to verify that every one of them is served by an index
+QUERY_PROBES: Dict[str, List[Dict[str, Any]]] = {
+    "appointments": [
+        {
+            "doctor_id": "DOC000",
+            "start_datetime": {"$lt": datetime(2000, 1, 2)},
+            "end_datetime": {"$gt": datetime(2000, 1, 1)},
+        },
+        {"patient_id": ObjectId("0" * 24), "start_datetime": {"$gte": datetime(2000, 1, 1)}},
+        {
+            "start_datetime": {"$gte": datetime(2000, 1, 1), "$lt": datetime(2000, 1, 1, 2)},
+            "reminder_sent_at": {"$exists": False},
+        },
+    ],
+    "schedules": [{"doctor_id": "DOC000"}],
+    "users": [{"email": "probe@example.com"}],
+    "otp_store": [{"email": "probe@example.com"}],
+    "doctors": [{"hospital_id": "HSP000"}],
+}
+
+
+# (collection, index name) pairs that correctness depends on, not just
+# speed: startup fails when one of them cannot be created
+REQUIRED_INDEXES = {
+    # OtpService.issue maps the duplicate key on a concurrent insert to 429
+    ("otp_store", "email_unique"),
+}
+
+
+class IndexBootstrapError(RuntimeError):
+    pass
+
+
+def ttl_indexes() -> List[Tuple[str, str, int]]:
+    """(collection, field, expireAfterSeconds) of every TTL index in the registry."""
+    return [
+        (collection_name, next(iter(index.document["key"])), index.document["expireAfterSeconds"])
+        for collection_name, indexes in INDEX_REGISTRY.items()
+        for index in indexes
+        if "expireAfterSeconds" in index.document
+    ]
+
+
+async def ensure_indexes() -> List[Tuple[str, str]]:
+    """
+    Create every index in `INDEX_REGISTRY`, one at a time so a rejected
+    index never takes the rest of its collection down with it.
+    `create_indexes` is a no-op for indexes that already exist, so this is
+    safe to run on every startup.
+
+    TTL indexes the server rejects (CosmosDB only allows TTL on `_ts`) are
+    created as plain indexes instead; `purge_expired` then does the cleanup.
+    Returns the (collection, index name) pairs that could not be created and
+    raises IndexBootstrapError if any of them is in `REQUIRED_INDEXES`.
+    """
+    db = get_database()
+    failed = []
+    for collection_name, indexes in INDEX_REGISTRY.items():
+        collection = db[collection_name]
+        for index in indexes:
+            name = index.document["name"]
+            try:
+                await collection.create_indexes([index])
+                continue
+            except OperationFailure as e:
+                logger.error("Failed to create index %s on %s: %s", name, collection_name, e)
+
+            if "expireAfterSeconds" in index.document:
+                try:
+                    await collection.create_indexes([IndexModel(list(index.document["key"].items()), name=name)])
+                    logger.warning("Created %s on %s without TTL; purge_expired removes old documents",
+                                   name, collection_name)
+                    continue
+                except OperationFailure as e:
+                    logger.error("Failed to create fallback index %s on %s: %s", name, collection_name, e)
+            failed.append((collection_name, name))
+
+    missing = REQUIRED_INDEXES.intersection(failed)
+    if missing:
+        raise IndexBootstrapError(f"Required indexes could not be created: {sorted(missing)}")
+    logger.info("Indexes ensured (%d failed: %s)", len(failed), failed)
+    return failed
+
+
+async def purge_expired(now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Application-level TTL: delete what each TTL index would have expired.
+    Redundant on MongoDB (where the TTL monitor already does this) but
+    required on servers that reject TTL indexes on arbitrary fields.
+    """
+    now = now or datetime.utcnow()
+    db = get_database()
+    deleted = {}
+    for collection_name, field, seconds in ttl_indexes():
+        result = await db[collection_name].delete_many({field: {"$lte": now - timedelta(seconds=seconds)}})
+        deleted[collection_name] = deleted.get(collection_name, 0) + result.deleted_count
+    return deleted
+
+
+def _plan_stages(plan: Any) -> List[str]:
+    """Collect every `stage` name in an explain() plan tree."""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+async def find_collscans() -> List[Dict[str, Any]]:
+    """
+    Run `explain` on every registered query probe and return the ones whose
+    winning plan falls back to a collection scan.
+    """
+    db = get_database()
+    collscans = []
+    for collection_name, probes in QUERY_PROBES.items():
+        for query in probes:
+            try:
+                explain = await db[collection_name].find(query).explain()
+            except OperationFailure as e:
+                logger.warning("explain failed on %s %s: %s", collection_name, query, e)
+                continue
+
+            winning_plan = explain.get("queryPlanner", {}).get("winningPlan", explain)
+            if "COLLSCAN" in _plan_stages(winning_plan):
+                collscans.append({"collection": collection_name, "query": query})
+
+    for entry in collscans:
+        logger.warning("COLLSCAN on %s for %s", entry["collection"], entry["query"])
+    return collscans
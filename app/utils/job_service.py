@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo import DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.config import JOB_LEASE_SECONDS
+from app.database import get_database
+
+logger = logging.getLogger(__name__)
+
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Identifies this process in leases and run history
+OWNER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class JobLease:
+    """
+    Mongo lease: one `job_leases` document per job name holding the current
+    owner and an expiry. Acquiring succeeds when nobody holds the lease, it
+    has expired (its holder died) or we already own it; otherwise the upsert
+    collides on `_id` and fails. Holders renew while they work.
+    """
+
+    @staticmethod
+    def _collection():
+        return get_database().job_leases
+
+    @classmethod
+    async def acquire(cls, job: str, owner: str = OWNER_ID, ttl_seconds: int = JOB_LEASE_SECONDS) -> bool:
+        now = datetime.utcnow()
+        try:
+            await cls._collection().find_one_and_update(
+                {"_id": job, "$or": [{"expires_at": {"$lte": now}}, {"owner": owner}]},
+                {"$set": {"owner": owner, "acquired_at": now, "expires_at": now + timedelta(seconds=ttl_seconds)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    @classmethod
+    async def renew(cls, job: str, owner: str = OWNER_ID, ttl_seconds: int = JOB_LEASE_SECONDS) -> bool:
+        result = await cls._collection().update_one(
+            {"_id": job, "owner": owner},
+            {"$set": {"expires_at": datetime.utcnow() + timedelta(seconds=ttl_seconds)}},
+        )
+        return result.matched_count == 1
+
+    @classmethod
+    async def release(cls, job: str, owner: str = OWNER_ID) -> None:
+        await cls._collection().delete_one({"_id": job, "owner": owner})
+
+
+class JobRunner:
+    """
+    Runs scheduled jobs so that each scheduled occurrence executes once
+    across every worker and replica:
+    - the job's lease keeps two runs of the same job from overlapping
+    - a `job_runs` document keyed by (job, scheduled time) is inserted
+      before running, so a worker whose trigger fired late cannot repeat an
+      occurrence that already ran
+    The `job_runs` documents double as the run history.
+    """
+
+    @staticmethod
+    def _runs():
+        return get_database().job_runs
+
+    @classmethod
+    async def run(
+        cls,
+        job: str,
+        func: Callable[[], Awaitable[Any]],
+        scheduled_for: datetime,
+        owner: str = OWNER_ID,
+        ttl_seconds: int = JOB_LEASE_SECONDS,
+    ) -> Optional[Dict]:
+        """Run `func` unless another worker has it; returns the run document or None if skipped."""
+        if not await JobLease.acquire(job, owner, ttl_seconds):
+            logger.info("Skipping %s: lease held by another worker", job)
+            return None
+
+        try:
+            started_at = datetime.utcnow()
+            run = {
+                "_id": f"{job}|{scheduled_for.isoformat()}",
+                "job": job,
+                "scheduled_for": scheduled_for,
+                "owner": owner,
+                "status": RUNNING,
+                "started_at": started_at,
+            }
+            try:
+                await cls._runs().insert_one(run)
+            except DuplicateKeyError:
+                logger.info("Skipping %s: occurrence %s already ran", job, scheduled_for)
+                return None
+
+            heartbeat = asyncio.create_task(cls._heartbeat(job, owner, ttl_seconds))
+            try:
+                result = await func()
+                update = {"status": SUCCEEDED, "result": result}
+            except Exception as e:
+                logger.exception("Job %s failed", job)
+                update = {"status": FAILED, "error": str(e)}
+            finally:
+                heartbeat.cancel()
+
+            finished_at = datetime.utcnow()
+            update.update(
+                {"finished_at": finished_at, "duration_seconds": (finished_at - started_at).total_seconds()}
+            )
+            await cls._runs().update_one({"_id": run["_id"]}, {"$set": update})
+            run.update(update)
+            return run
+        finally:
+            await JobLease.release(job, owner)
+
+    @staticmethod
+    async def _heartbeat(job: str, owner: str, ttl_seconds: int) -> None:
+        while True:
+            await asyncio.sleep(max(1, ttl_seconds // 3))
+            if not await JobLease.renew(job, owner, ttl_seconds):
+                logger.warning("Lost the lease for %s while running", job)
+                return
+
+    @classmethod
+    async def history(cls, job: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        query = {"job": job} if job else {}
+        return await cls._runs().find(query).sort("started_at", DESCENDING).limit(limit).to_list(length=limit)
@@ -0,0 +1,71 @@
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class JoinService:
+    """
+    Helpers for resolving the doctor / patient documents referenced by a batch
+    of appointments with one `$in` query per collection instead of one
+    `find_one` per row.
+    """
+
+    @staticmethod
+    async def fetch_by_ids(
+        collection,
+        ids: Iterable[Any],
+        projection: Optional[Dict[str, int]] = None,
+    ) -> Dict[Any, dict]:
+        """
+        Fetch every document whose `_id` is in `ids` with a single query.
+
+        Returns a dict keyed by `_id` so callers can assemble rows in memory.
+        """
+        unique_ids = list({i for i in ids if i is not None})
+        if not unique_ids:
+            return {}
+
+        docs = await collection.find(
+            {"_id": {"$in": unique_ids}}, projection
+        ).to_list(length=None)
+        return {doc["_id"]: doc for doc in docs}
+
+    @classmethod
+    async def load_appointment_refs(
+        cls,
+        appointments: List[dict],
+        doctors_collection=None,
+        patients_collection=None,
+        doctor_projection: Optional[Dict[str, int]] = None,
+        patient_projection: Optional[Dict[str, int]] = None,
+    ) -> Tuple[Dict[Any, dict], Dict[Any, dict]]:
+        """
+        Resolve the doctors and/or patients referenced by `appointments`.
+
+        Both lookups run concurrently; pass `None` for a collection to skip it.
+        Returns `(doctors_by_id, patients_by_id)`.
+        """
+
+        async def _empty() -> Dict[Any, dict]:
+            return {}
+
+        doctors_task = (
+            cls.fetch_by_ids(
+                doctors_collection,
+                (a.get("doctor_id") for a in appointments),
+                doctor_projection,
+            )
+            if doctors_collection is not None
+            else _empty()
+        )
+        patients_task = (
+            cls.fetch_by_ids(
+                patients_collection,
+                (a.get("patient_id") for a in appointments),
+                patient_projection,
+            )
+            if patients_collection is not None
+            else _empty()
+        )
+
+        doctors, patients = await asyncio.gather(doctors_task, patients_task)
+        return doctors, patients
@@ -0,0 +1,150 @@
+import secrets
+import string
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.config import (
+    OTP_MAX_ATTEMPTS,
+    OTP_RATE_LIMIT_COUNT,
+    OTP_RATE_LIMIT_WINDOW_SECONDS,
+    OTP_TTL_MINUTES,
+    OTP_VERIFIED_TTL_MINUTES,
+)
+from app.database import otps_collection
+
+
+def generate_otp() -> str:
+    return "".join(secrets.choice(string.digits) for _ in range(6))
+
+
+class OtpService:
+    """
+    One `otp_store` document per email (unique index). Each write is a
+    single atomic operation:
+    - `issue` rate-limits with a sliding window of recent request times kept
+      on the document and stores a fresh code, in one conditional update
+      (or an insert for a new email)
+    - `verify` checks and consumes the code with one find_one_and_update
+    - `consume_verified` spends a verified code for a password reset
+    Documents are removed by a TTL index on `purge_at`, which outlives both
+    the code and the rate-limit window.
+    """
+
+    @staticmethod
+    def _not_rate_limited(window_start: datetime) -> dict:
+        # Requests are appended in time order, so the limit is hit when the
+        # OTP_RATE_LIMIT_COUNT-th most recent one is still inside the window
+        requests = {"$ifNull": ["$requests", []]}
+        return {
+            "$expr": {
+                "$not": {
+                    "$and": [
+                        {"$gte": [{"$size": requests}, OTP_RATE_LIMIT_COUNT]},
+                        {"$gte": [{"$arrayElemAt": [requests, -OTP_RATE_LIMIT_COUNT]}, window_start]},
+                    ]
+                }
+            }
+        }
+
+    @classmethod
+    async def issue(cls, email: str) -> str:
+        """Store and return a new code; raises 429 when the email is rate limited."""
+        now = datetime.utcnow()
+        window_start = now - timedelta(seconds=OTP_RATE_LIMIT_WINDOW_SECONDS)
+        expiry = now + timedelta(minutes=OTP_TTL_MINUTES)
+        otp = generate_otp()
+        purge_at = max(expiry, now + timedelta(seconds=OTP_RATE_LIMIT_WINDOW_SECONDS))
+
+        existing = await otps_collection.find_one({"email": email}, {"_id": 1})
+        if existing is None:
+            try:
+                await otps_collection.insert_one({
+                    "email": email,
+                    "otp": otp,
+                    "expiry": expiry,
+                    "verified": False,
+                    "attempts": 0,
+                    "created_at": now,
+                    "requests": [now],
+                    "purge_at": purge_at,
+                })
+            except DuplicateKeyError:
+                # A concurrent request for the same email inserted first
+                raise HTTPException(status_code=429, detail="Too many OTP requests. Please try again later.")
+            return otp
+
+        recent = {
+            "$filter": {
+                "input": {"$ifNull": ["$requests", []]},
+                "cond": {"$gte": ["$$this", window_start]},
+            }
+        }
+        # $expr is not allowed in upsert filters, so this update never upserts
+        result = await otps_collection.update_one(
+            {"_id": existing["_id"], **cls._not_rate_limited(window_start)},
+            [
+                {"$set": {
+                    "otp": otp,
+                    "expiry": expiry,
+                    "verified": False,
+                    "attempts": 0,
+                    "created_at": now,
+                    "requests": {"$concatArrays": [recent, [now]]},
+                    "purge_at": purge_at,
+                }}
+            ],
+        )
+        if result.matched_count == 0:
+            # The document exists but did not match: too many recent requests
+            raise HTTPException(status_code=429, detail="Too many OTP requests. Please try again later.")
+        return otp
+
+    @classmethod
+    async def verify(cls, email: str, otp: Optional[str]) -> Tuple[bool, str]:
+        if not isinstance(otp, str) or not otp:
+            return False, "Invalid OTP"
+        now = datetime.utcnow()
+        verified = await otps_collection.find_one_and_update(
+            {
+                "email": email,
+                # The code is unset once verified; never match a missing one
+                "otp": {"$eq": otp, "$exists": True},
+                "verified": False,
+                "expiry": {"$gt": now},
+                "attempts": {"$lt": OTP_MAX_ATTEMPTS},
+            },
+            {
+                "$set": {"verified": True, "expiry": now + timedelta(minutes=OTP_VERIFIED_TTL_MINUTES)},
+                "$max": {"purge_at": now + timedelta(minutes=OTP_VERIFIED_TTL_MINUTES)},
+                "$unset": {"otp": ""},
+            },
+        )
+        if verified:
+            return True, "OTP verified"
+
+        # Failure path only: count the attempt and work out why it failed
+        record = await otps_collection.find_one_and_update(
+            {"email": email, "otp": {"$exists": True}},
+            {"$inc": {"attempts": 1}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if not record:
+            return False, "No OTP found"
+        if now > record["expiry"]:
+            return False, "OTP expired"
+        if record["attempts"] > OTP_MAX_ATTEMPTS:
+            return False, "Too many attempts. Please request a new OTP"
+        return False, "Invalid OTP"
+
+    @classmethod
+    async def consume_verified(cls, email: str) -> bool:
+        """Spend a verified, unexpired code; True if there was one."""
+        record = await otps_collection.find_one_and_update(
+            {"email": email, "verified": True, "expiry": {"$gt": datetime.utcnow()}},
+            {"$set": {"verified": False}},
+        )
+        return record is not None
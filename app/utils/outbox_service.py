@@ -0,0 +1,234 @@
+import asyncio
+import logging
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+from app.config import (
+    EMAIL_BATCH_MAX_RECIPIENTS,
+    EMAIL_SEND_CONCURRENCY,
+    OUTBOX_BACKOFF_BASE_SECONDS,
+    OUTBOX_BACKOFF_MAX_SECONDS,
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_LEASE_SECONDS,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_POLL_INTERVAL_SECONDS,
+)
+from app.database import get_database
+from .dispatch import run_bounded
+from .email_service import get_email_sender
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+
+
+class OutboxService:
+    """
+    Mongo-backed email outbox. Messages are written as `pending` documents
+    and moved through `sending` to `sent`, or back to `pending` with an
+    exponential backoff after a failed attempt, and finally to `failed`
+    after `OUTBOX_MAX_ATTEMPTS`. A `sending` message whose lease expired
+    (its worker died mid-send) becomes claimable again.
+    """
+
+    @staticmethod
+    def _collection():
+        return get_database().email_outbox
+
+    @classmethod
+    async def enqueue(
+        cls, recipient_email: str, subject: str, body: str, body_html: str = None
+    ) -> ObjectId:
+        now = datetime.utcnow()
+        result = await cls._collection().insert_one(
+            {
+                "recipient": recipient_email,
+                "subject": subject,
+                "body": body,
+                "body_html": body_html,
+                "status": PENDING,
+                "attempts": 0,
+                "next_attempt_at": now,
+                "created_at": now,
+                "updated_at": now,
+                "last_error": None,
+            }
+        )
+        return result.inserted_id
+
+    @staticmethod
+    def backoff_seconds(attempts: int) -> float:
+        """Delay before retry number `attempts` (1-based), with ±10% jitter."""
+        delay = min(OUTBOX_BACKOFF_MAX_SECONDS, OUTBOX_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1))
+        return delay * random.uniform(0.9, 1.1)
+
+    @classmethod
+    async def claim_batch(cls, batch_size: int = OUTBOX_BATCH_SIZE) -> List[dict]:
+        """
+        Atomically move up to `batch_size` due messages to `sending` under a
+        fresh claim token and return them. Three round trips regardless of
+        batch size; the conditional update_many makes concurrent workers
+        claim disjoint sets.
+        """
+        collection = cls._collection()
+        now = datetime.utcnow()
+        claimable = {
+            "$or": [
+                {"status": PENDING, "next_attempt_at": {"$lte": now}},
+                {"status": SENDING, "locked_until": {"$lt": now}},
+            ]
+        }
+
+        candidates = await collection.find(claimable, {"_id": 1}).sort(
+            "next_attempt_at", 1
+        ).limit(batch_size).to_list(length=None)
+        if not candidates:
+            return []
+
+        claim_id = uuid.uuid4().hex
+        await collection.update_many(
+            {"$and": [{"_id": {"$in": [c["_id"] for c in candidates]}}, claimable]},
+            {
+                "$set": {
+                    "status": SENDING,
+                    "claim_id": claim_id,
+                    "locked_until": now + timedelta(seconds=OUTBOX_LEASE_SECONDS),
+                    "updated_at": now,
+                }
+            },
+        )
+        return await collection.find({"claim_id": claim_id, "status": SENDING}).to_list(length=None)
+
+    @classmethod
+    async def mark_sent(cls, ids: List[ObjectId], claim_id: str) -> None:
+        # Only while our claim still holds: an expired claim may have been
+        # taken over by another worker, which now owns the outcome
+        now = datetime.utcnow()
+        await cls._collection().update_many(
+            {"_id": {"$in": ids}, "claim_id": claim_id, "status": SENDING},
+            {"$set": {"status": SENT, "sent_at": now, "updated_at": now, "last_error": None},
+             "$inc": {"attempts": 1}},
+        )
+
+    @classmethod
+    async def mark_failed(cls, docs: List[dict], error: Exception, claim_id: str) -> None:
+        collection = cls._collection()
+        now = datetime.utcnow()
+        for doc in docs:
+            attempts = doc.get("attempts", 0) + 1
+            update = {"attempts": attempts, "updated_at": now, "last_error": str(error)}
+            if attempts >= OUTBOX_MAX_ATTEMPTS:
+                update["status"] = FAILED
+            else:
+                update["status"] = PENDING
+                update["next_attempt_at"] = now + timedelta(seconds=cls.backoff_seconds(attempts))
+            await collection.update_one(
+                {"_id": doc["_id"], "claim_id": claim_id, "status": SENDING}, {"$set": update}
+            )
+
+    @classmethod
+    async def drain_once(
+        cls,
+        sender,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        concurrency: int = EMAIL_SEND_CONCURRENCY,
+    ) -> Dict[str, int]:
+        """
+        Claim one batch and deliver it. Messages with identical content are
+        merged into a single send of up to `EMAIL_BATCH_MAX_RECIPIENTS`.
+        """
+        docs = await cls.claim_batch(batch_size)
+        if not docs:
+            return {"claimed": 0, "sent": 0, "failed": 0}
+        claim_id = docs[0]["claim_id"]
+
+        groups: Dict[Tuple[str, str, Optional[str]], List[dict]] = {}
+        for doc in docs:
+            groups.setdefault((doc["subject"], doc["body"], doc.get("body_html")), []).append(doc)
+
+        sends = []
+        for (subject, body, body_html), members in groups.items():
+            for i in range(0, len(members), EMAIL_BATCH_MAX_RECIPIENTS):
+                sends.append((subject, body, body_html, members[i:i + EMAIL_BATCH_MAX_RECIPIENTS]))
+
+        async def deliver(item):
+            subject, body, body_html, members = item
+            await sender.send([m["recipient"] for m in members], subject, body, body_html)
+
+        results = await run_bounded(sends, deliver, concurrency)
+
+        summary = {"claimed": len(docs), "sent": 0, "failed": 0}
+        sent_ids = []
+        for (subject, _, _, members), result in zip(sends, results):
+            if isinstance(result, Exception):
+                logger.error("Failed to send %r to %d recipients: %s", subject, len(members), result)
+                await cls.mark_failed(members, result, claim_id)
+                summary["failed"] += len(members)
+            else:
+                sent_ids.extend(m["_id"] for m in members)
+                summary["sent"] += len(members)
+        if sent_ids:
+            await cls.mark_sent(sent_ids, claim_id)
+        return summary
+
+
+class OutboxWorker:
+    """Polls the outbox and drains it until stopped."""
+
+    def __init__(
+        self,
+        sender=None,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        concurrency: int = EMAIL_SEND_CONCURRENCY,
+        poll_interval: float = OUTBOX_POLL_INTERVAL_SECONDS,
+    ):
+        self.sender = sender or get_email_sender()
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def run(self) -> None:
+        logger.info("Outbox worker started (sender=%s)", type(self.sender).__name__)
+        while not self._stop.is_set():
+            try:
+                summary = await OutboxService.drain_once(self.sender, self.batch_size, self.concurrency)
+            except Exception as e:
+                logger.exception("Outbox drain failed: %s", e)
+                summary = {"claimed": 0}
+
+            # A full batch means there is probably more waiting
+            if summary["claimed"] >= self.batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+        logger.info("Outbox worker stopped")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._stop.clear()
+            self._task = asyncio.create_task(self.run())
+
+    def request_stop(self) -> None:
+        self._stop.set()
+
+    async def stop(self) -> None:
+        self.request_stop()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+
+async def enqueue_email(recipient_email: str, subject: str, body: str, body_html: str = None):
+    """Persist an email to the outbox for background delivery."""
+    await OutboxService.enqueue(recipient_email, subject, body, body_html)
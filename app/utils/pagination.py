@@ -0,0 +1,153 @@
+import base64
+import json
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from bson import json_util
+from fastapi import HTTPException, status
+from pymongo import ASCENDING
+
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 200
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def encode_cursor(sort_value: Any, last_id: Any) -> str:
+    """Encode the sort key of the last returned document as an opaque token."""
+    raw = json_util.dumps({"v": sort_value, "id": last_id})
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(token: str) -> Tuple[Any, Any]:
+    """Inverse of `encode_cursor`. Raises 400 on a malformed token."""
+    try:
+        raw = base64.urlsafe_b64decode(token.encode()).decode()
+        data = json_util.loads(raw)
+        return data["v"], data["id"]
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor",
+        )
+
+
+def keyset_filter(
+    query: Dict[str, Any],
+    cursor: Optional[str],
+    sort_field: str = "_id",
+    direction: int = ASCENDING,
+) -> Dict[str, Any]:
+    """
+    Extend `query` so it only matches documents after `cursor` in the
+    (`sort_field`, `_id`) ordering.
+    """
+    if not cursor:
+        return query
+
+    sort_value, last_id = decode_cursor(cursor)
+    op = "$gt" if direction == ASCENDING else "$lt"
+
+    if sort_field == "_id":
+        after = {"_id": {op: last_id}}
+    else:
+        after = {
+            "$or": [
+                {sort_field: {op: sort_value}},
+                {sort_field: sort_value, "_id": {op: last_id}},
+            ]
+        }
+
+    return {"$and": [query, after]} if query else after
+
+
+def sort_spec(sort_field: str = "_id", direction: int = ASCENDING) -> List[Tuple[str, int]]:
+    """Stable sort for keyset pagination: `_id` breaks ties on `sort_field`."""
+    if sort_field == "_id":
+        return [("_id", direction)]
+    return [(sort_field, direction), ("_id", direction)]
+
+
+def clamp_limit(limit: Optional[int]) -> Optional[int]:
+    if limit is None:
+        return None
+    if limit < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="limit must be a positive integer",
+        )
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def open_cursor(
+    collection,
+    query: Dict[str, Any],
+    cursor: Optional[str] = None,
+    sort_field: str = "_id",
+    direction: int = ASCENDING,
+    projection: Optional[Dict[str, int]] = None,
+):
+    """Motor cursor over `query` in keyset order, starting after `cursor`."""
+    return collection.find(
+        keyset_filter(query, cursor, sort_field, direction), projection
+    ).sort(sort_spec(sort_field, direction))
+
+
+async def fetch_page(
+    collection,
+    query: Dict[str, Any],
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    sort_field: str = "_id",
+    direction: int = ASCENDING,
+    projection: Optional[Dict[str, int]] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Fetch one keyset page of `collection`.
+
+    Returns `(docs, next_cursor)`. `next_cursor` is None on the last page.
+    With neither `limit` nor `cursor` the whole (sorted) result is returned,
+    which keeps existing callers working unchanged.
+    """
+    limit = clamp_limit(limit)
+    find = open_cursor(collection, query, cursor, sort_field, direction, projection)
+
+    if limit is None:
+        return await find.to_list(length=None), None
+
+    # Read one extra document to know whether another page exists
+    docs = await find.limit(limit + 1).to_list(length=None)
+    if len(docs) <= limit:
+        return docs, None
+
+    docs = docs[:limit]
+    last = docs[-1]
+    return docs, encode_cursor(last.get(sort_field) if sort_field != "_id" else None, last["_id"])
+
+
+async def iter_batches(cursor, size: int = STREAM_BATCH_SIZE) -> AsyncIterator[List[dict]]:
+    """Group documents from a Motor cursor into lists of at most `size`."""
+    batch: List[dict] = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def ndjson_lines(
+    batches: AsyncIterator[List[dict]],
+    serialize: Optional[Callable[[dict], Optional[Dict[str, Any]]]] = None,
+) -> AsyncIterator[str]:
+    """
+    Render documents as newline-delimited JSON as they arrive from the cursor.
+    Documents for which `serialize` returns None are skipped.
+    """
+    async for batch in batches:
+        lines = []
+        for doc in batch:
+            row = serialize(doc) if serialize else doc
+            if row is not None:
+                lines.append(json.dumps(row, default=str))
+        if lines:
+            yield "\n".join(lines) + "\n"
@@ -0,0 +1,85 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from app.config import PASSWORD_HASH_WORKERS, PASSWORD_SCRYPT_N, PASSWORD_SCRYPT_P, PASSWORD_SCRYPT_R
+
+# Unsalted SHA-256 hex digests written by the original hash_password
+LEGACY_SHA256 = re.compile(r"^[0-9a-f]{64}$")
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode().rstrip("=")
+
+
+def _unb64(data: str) -> bytes:
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+class ScryptHasher:
+    """
+    Salted scrypt hashes encoded as `scrypt$<n>$<r>$<p>$<salt>$<hash>`, so
+    every stored hash records the cost it was made with. Legacy SHA-256
+    digests still verify and are reported by `needs_rehash`.
+    """
+
+    algorithm = "scrypt"
+
+    def __init__(self, n: int = PASSWORD_SCRYPT_N, r: int = PASSWORD_SCRYPT_R, p: int = PASSWORD_SCRYPT_P,
+                 salt_size: int = 16, dklen: int = 32):
+        self.n, self.r, self.p = n, r, p
+        self.salt_size = salt_size
+        self.dklen = dklen
+
+    @staticmethod
+    def _derive(password: str, salt: bytes, n: int, r: int, p: int, dklen: int) -> bytes:
+        # scrypt needs ~128 * n * r bytes; leave headroom over OpenSSL's 32 MB default
+        return hashlib.scrypt(
+            password.encode(), salt=salt, n=n, r=r, p=p, dklen=dklen, maxmem=256 * n * r + 1024 * 1024
+        )
+
+    def hash(self, password: str) -> str:
+        salt = os.urandom(self.salt_size)
+        digest = self._derive(password, salt, self.n, self.r, self.p, self.dklen)
+        return f"{self.algorithm}${self.n}${self.r}${self.p}${_b64(salt)}${_b64(digest)}"
+
+    def verify(self, password: str, encoded: Optional[str]) -> bool:
+        if not encoded:
+            return False
+        if LEGACY_SHA256.match(encoded):
+            return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), encoded)
+
+        try:
+            algorithm, n, r, p, salt, digest = encoded.split("$")
+            if algorithm != self.algorithm:
+                return False
+            expected = _unb64(digest)
+            actual = self._derive(password, _unb64(salt), int(n), int(r), int(p), len(expected))
+        except (ValueError, TypeError):
+            return False
+        return hmac.compare_digest(actual, expected)
+
+    def needs_rehash(self, encoded: str) -> bool:
+        return not encoded.startswith(f"{self.algorithm}${self.n}${self.r}${self.p}$")
+
+
+password_hasher = ScryptHasher()
+
+# KDF work never runs on the event loop; the pool size bounds how many
+# hashes run at once (and so CPU and scrypt memory per process)
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+
+async def hash_password_async(password: str, hasher: ScryptHasher = None) -> str:
+    hasher = hasher or password_hasher
+    return await asyncio.get_running_loop().run_in_executor(_executor, hasher.hash, password)
+
+
+async def verify_password_async(password: str, encoded: str, hasher: ScryptHasher = None) -> bool:
+    hasher = hasher or password_hasher
+    return await asyncio.get_running_loop().run_in_executor(_executor, hasher.verify, password, encoded)
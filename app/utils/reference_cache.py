@@ -0,0 +1,138 @@
+import asyncio
+import copy
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from cachetools import TTLCache
+
+from app.config import REFERENCE_CACHE_MAX_ENTRIES, REFERENCE_CACHE_TTL_SECONDS
+from app.database import get_database
+from .slot_cache import SlotCache
+
+logger = logging.getLogger(__name__)
+
+DOCTOR = "doctor"
+SCHEDULE = "schedule"
+HOSPITAL = "hospital"
+HOSPITALS = "hospitals"
+
+
+class ReferenceCache:
+    """
+    Read-through, in-process cache for reference data that changes rarely
+    but is read on every booking: doctor profiles, schedules and hospitals.
+    Writers call the `invalidate_*` hooks; the TTL bounds staleness from
+    writes made by other processes (or `watch_changes` removes it when
+    change streams are available). Missing documents are not cached.
+    Callers get deep copies, so mutating a result never corrupts the cache.
+    """
+
+    _entries: TTLCache = TTLCache(maxsize=REFERENCE_CACHE_MAX_ENTRIES, ttl=REFERENCE_CACHE_TTL_SECONDS)
+    _loading: Dict[Tuple[str, Hashable], asyncio.Future] = {}
+
+    @classmethod
+    async def get_or_load(cls, kind: str, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        cache_key = (kind, key)
+        value = cls._entries.get(cache_key)
+        if value is not None:
+            return copy.deepcopy(value)
+
+        # Concurrent misses for the same key share one database read
+        pending = cls._loading.get(cache_key)
+        if pending is not None:
+            return copy.deepcopy(await asyncio.shield(pending))
+
+        future = asyncio.get_running_loop().create_future()
+        cls._loading[cache_key] = future
+        try:
+            value = await loader()
+            if value is not None:
+                cls._entries[cache_key] = value
+            future.set_result(value)
+        except Exception as e:
+            future.set_exception(e)
+            # Retrieve it so waiter-less failures are not logged as unhandled
+            future.exception()
+            raise
+        finally:
+            cls._loading.pop(cache_key, None)
+        return copy.deepcopy(value)
+
+    @classmethod
+    async def get_doctor(cls, doctor_id: str) -> Optional[dict]:
+        return await cls.get_or_load(DOCTOR, doctor_id, lambda: get_database().doctors.find_one({"_id": doctor_id}))
+
+    @classmethod
+    async def get_schedule(cls, doctor_id: str) -> Optional[dict]:
+        return await cls.get_or_load(
+            SCHEDULE, doctor_id, lambda: get_database().schedules.find_one({"doctor_id": doctor_id})
+        )
+
+    @classmethod
+    async def get_hospital(cls, hospital_id: str) -> Optional[dict]:
+        return await cls.get_or_load(
+            HOSPITAL, hospital_id, lambda: get_database().hosptials.find_one({"_id": hospital_id})
+        )
+
+    @classmethod
+    async def get_hospitals(cls) -> List[dict]:
+        return await cls.get_or_load(
+            HOSPITALS, None, lambda: get_database().hosptials.find({}).sort("_id", 1).to_list(length=None)
+        )
+
+    @classmethod
+    def invalidate(cls, kind: str, key: Hashable) -> None:
+        cls._entries.pop((kind, key), None)
+
+    @classmethod
+    def invalidate_doctor(cls, doctor_id: str) -> None:
+        cls.invalidate(DOCTOR, doctor_id)
+
+    @classmethod
+    def invalidate_schedule(cls, doctor_id: str) -> None:
+        cls.invalidate(SCHEDULE, doctor_id)
+
+    @classmethod
+    def invalidate_hospital(cls, hospital_id: Optional[str] = None) -> None:
+        if hospital_id is not None:
+            cls.invalidate(HOSPITAL, hospital_id)
+        cls.invalidate(HOSPITALS, None)
+
+    @classmethod
+    def invalidate_kind(cls, kind: str) -> None:
+        for cache_key in [k for k in list(cls._entries.keys()) if k[0] == kind]:
+            cls._entries.pop(cache_key, None)
+
+    @classmethod
+    async def watch_changes(cls) -> None:
+        """
+        Invalidate entries from a database change stream so writes made by
+        other processes show up immediately. Requires a replica set; returns
+        (leaving TTL expiry in charge) when change streams are unavailable.
+        """
+        pipeline = [{"$match": {"ns.coll": {"$in": ["doctors", "schedules", "hosptials"]}}}]
+        try:
+            async with get_database().watch(pipeline, full_document="updateLookup") as stream:
+                async for change in stream:
+                    cls._apply_change(change)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Reference cache change stream stopped: %s", e)
+
+    @classmethod
+    def _apply_change(cls, change: dict) -> None:
+        collection = change.get("ns", {}).get("coll")
+        key = change.get("documentKey", {}).get("_id")
+        if collection == "doctors":
+            cls.invalidate_doctor(key)
+        elif collection == "hosptials":
+            cls.invalidate_hospital(key)
+        elif collection == "schedules":
+            doctor_id = (change.get("fullDocument") or {}).get("doctor_id")
+            if doctor_id:
+                cls.invalidate_schedule(doctor_id)
+                SlotCache.invalidate(doctor_id)
+            else:
+                # Deletes carry only the ObjectId; drop every schedule
+                cls.invalidate_kind(SCHEDULE)
@@ -0,0 +1,143 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+from zoneinfo import ZoneInfo
+
+from app.config import (
+    APPOINTMENT_TIMEZONE,
+    REMINDER_CONCURRENCY,
+    REMINDER_LEAD_MINUTES,
+    REMINDER_RATE_PER_SECOND,
+)
+from app.database import get_database
+from .dispatch import RateLimiter, run_bounded
+from .email_service import send_email
+from .join_service import JoinService
+
+logger = logging.getLogger(__name__)
+
+EmailSender = Callable[[str, str, str, Optional[str]], Awaitable[Any]]
+
+
+def build_reminder_email(appt: dict, doctor_name: str, doctor_hospital: str):
+    subject = "Appointment Reminder"
+    body_text = (
+        f"Hello,\n\nThis is a reminder for your appointment.\n"
+        f"👨‍⚕️ Doctor: {doctor_name} ({doctor_hospital})\n"
+        f"🗓 Date/Time: {appt['start_datetime']} - {appt['end_datetime']}\n"
+        f"Purpose: {appt.get('purpose')}\n\n"
+        "Please be on time. Thank you!"
+    )
+
+    body_html = f"""
+        <html>
+        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+            <p>Hello,</p>
+            <p>This is a reminder for your appointment.</p>
+            <ul>
+            <li><b>👨‍⚕️ Doctor:</b> {doctor_name} ({doctor_hospital})</li>
+            <li><b>🗓 Date/Time:</b> {appt['start_datetime']} - {appt['end_datetime']}</li>
+            <li><b>Purpose:</b> {appt.get('purpose')}</li>
+            </ul>
+            <p>Please be on time. Thank you!</p>
+        </body>
+        </html>
+    """
+    return subject, body_text, body_html
+
+
+class ReminderService:
+    """
+    Sends appointment reminders as a pipeline: one indexed range query for
+    the due appointments, one `$in` query each for patient emails and
+    doctors, then a bounded, rate-limited pool of senders. Each reminder is
+    claimed by atomically stamping `reminder_sent_at` before it is sent (and
+    unstamped if sending fails), so overlapping or repeated runs never send
+    the same reminder twice.
+    """
+
+    @classmethod
+    async def send_due_reminders(
+        cls, now: Optional[datetime] = None, lead_minutes: int = REMINDER_LEAD_MINUTES, **kwargs
+    ) -> Dict[str, int]:
+        """Remind every appointment starting within the next `lead_minutes`."""
+        if now is None:
+            now = datetime.now(ZoneInfo(APPOINTMENT_TIMEZONE)).replace(tzinfo=None)
+        return await cls.send_reminders(now, now + timedelta(minutes=lead_minutes), **kwargs)
+
+    @staticmethod
+    async def send_reminders(
+        window_start: datetime,
+        window_end: datetime,
+        sender: EmailSender = send_email,
+        concurrency: int = REMINDER_CONCURRENCY,
+        rate_per_second: float = REMINDER_RATE_PER_SECOND,
+    ) -> Dict[str, int]:
+        db = get_database()
+        appointments_collection = db.appointments
+
+        due = await appointments_collection.find(
+            {
+                "start_datetime": {"$gte": window_start, "$lt": window_end},
+                "reminder_sent_at": {"$exists": False},
+            },
+            {"patient_id": 1, "doctor_id": 1, "start_datetime": 1, "end_datetime": 1, "purpose": 1},
+        ).to_list(length=None)
+        logger.info("Found %d appointments needing reminders", len(due))
+
+        doctors_by_id, patients_by_id = await JoinService.load_appointment_refs(
+            due,
+            doctors_collection=db.doctors,
+            patients_collection=db.users,
+            doctor_projection={"name": 1, "hospital": 1},
+            patient_projection={"email": 1},
+        )
+
+        async def claim(appt: dict, **extra) -> bool:
+            result = await appointments_collection.update_one(
+                {"_id": appt["_id"], "reminder_sent_at": {"$exists": False}},
+                {"$set": {"reminder_sent_at": datetime.utcnow(), **extra}},
+            )
+            return result.modified_count == 1
+
+        async def send_one(appt: dict) -> bool:
+            patient = patients_by_id.get(appt.get("patient_id"))
+            patient_email = patient.get("email") if patient else None
+            if not patient_email:
+                logger.warning("No email found for patient %s", appt.get("patient_id"))
+                # Stamp it anyway so later runs stop picking it up
+                await claim(appt, reminder_skipped="no patient email")
+                return False
+
+            if not await claim(appt):
+                return False  # reminded by a concurrent run
+
+            doctor = doctors_by_id.get(appt.get("doctor_id"))
+            doctor_name = doctor.get("name", "Doctor") if doctor else appt.get("doctor_id")
+            doctor_hospital = doctor.get("hospital", "Unknown Hospital") if doctor else "Unknown Hospital"
+
+            subject, body_text, body_html = build_reminder_email(appt, doctor_name, doctor_hospital)
+            try:
+                await sender(patient_email, subject, body_text, body_html)
+            except Exception:
+                # Release the claim so the next run retries it
+                await appointments_collection.update_one(
+                    {"_id": appt["_id"]}, {"$unset": {"reminder_sent_at": ""}}
+                )
+                raise
+            return True
+
+        results = await run_bounded(due, send_one, concurrency, RateLimiter(rate_per_second))
+
+        summary = {"due": len(due), "sent": 0, "skipped": 0, "failed": 0}
+        for appt, result in zip(due, results):
+            if isinstance(result, Exception):
+                summary["failed"] += 1
+                logger.error("Failed to send reminder for appointment %s: %s", appt["_id"], result)
+            elif result:
+                summary["sent"] += 1
+            else:
+                summary["skipped"] += 1
+
+        logger.info("Reminder run finished: %s", summary)
+        return summary
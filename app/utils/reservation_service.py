@@ -0,0 +1,86 @@
+import math
+from datetime import datetime, time, timedelta
+from typing import List
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+from pymongo.errors import BulkWriteError
+
+from app.database import get_database
+from .slot_cache import SLOT_MINUTES
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+class ReservationService:
+    """
+    Race-free slot booking. Every 15-minute grid slot covered by an
+    appointment is claimed as a document in `slot_reservations` whose `_id`
+    is `<doctor_id>|<slot start>`. The `_id` index is unique, so two
+    concurrent bookings of the same slot cannot both succeed and the loser
+    gets a duplicate-key error from the database in the same round trip.
+    """
+
+    @staticmethod
+    def slot_starts(start: datetime, end: datetime) -> List[datetime]:
+        """
+        Start of every grid slot overlapping [start, end). The grid is
+        anchored at midnight, not at the schedule's start_time, so the same
+        instant always maps to the same reservation `_id` even after a
+        doctor's hours change; starts off the grid are rounded outwards, so
+        any two overlapping appointments share at least one slot.
+        """
+        slot = timedelta(minutes=SLOT_MINUTES)
+        grid_origin = datetime.combine(start.date(), time.min)
+        first = math.floor((start - grid_origin) / slot)
+        last = math.ceil((end - grid_origin) / slot)
+        return [grid_origin + i * slot for i in range(first, last)]
+
+    @staticmethod
+    def reservation_id(doctor_id: str, slot_start: datetime) -> str:
+        return f"{doctor_id}|{slot_start.isoformat()}"
+
+    @classmethod
+    async def reserve(
+        cls, doctor_id: str, appointment_id: ObjectId, slot_starts: List[datetime]
+    ) -> None:
+        """
+        Claim every slot in `slot_starts` for `appointment_id`, or none of them.
+        Raises 409 when any slot is already reserved.
+        """
+        reservations_collection = get_database().slot_reservations
+        now = datetime.utcnow()
+        docs = [
+            {
+                "_id": cls.reservation_id(doctor_id, slot_start),
+                "doctor_id": doctor_id,
+                "slot_start": slot_start,
+                "appointment_id": appointment_id,
+                "created_at": now,
+            }
+            for slot_start in slot_starts
+        ]
+        if not docs:
+            return
+
+        try:
+            await reservations_collection.insert_many(docs, ordered=True)
+        except BulkWriteError as e:
+            # Ordered inserts stop at the first conflict; undo the ones before it
+            inserted = e.details.get("nInserted", 0)
+            if inserted:
+                await reservations_collection.delete_many(
+                    {"_id": {"$in": [doc["_id"] for doc in docs[:inserted]]}}
+                )
+            if any(err.get("code") == DUPLICATE_KEY_ERROR for err in e.details.get("writeErrors", [])):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="The requested time slot overlaps with an existing appointment.",
+                )
+            raise
+
+    @staticmethod
+    async def release(appointment_id: ObjectId) -> None:
+        """Free every slot held by `appointment_id`."""
+        reservations_collection = get_database().slot_reservations
+        await reservations_collection.delete_many({"appointment_id": appointment_id})
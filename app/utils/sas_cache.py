@@ -0,0 +1,71 @@
+import math
+import time
+from datetime import datetime
+from typing import Optional
+
+from cachetools import LRUCache
+
+from app.config import (
+    SAS_BUCKET_SECONDS,
+    SAS_CACHE_MAX_ENTRIES,
+    SAS_MIN_REMAINING_SECONDS,
+    SAS_TTL_SECONDS,
+)
+
+
+def sas_expiry(now: float) -> float:
+    """
+    Expiry for a token signed at `now`: the end of the current time bucket
+    plus SAS_TTL_SECONDS. Every signature made within one bucket therefore
+    has identical inputs, so it is the same token across workers and
+    replicas (and browser caches keep working).
+    """
+    bucket_end = math.floor(now / SAS_BUCKET_SECONDS + 1) * SAS_BUCKET_SECONDS
+    return bucket_end + SAS_TTL_SECONDS
+
+
+def sign_blob_url(container: str, blob_name: str, expiry: float) -> str:
+    """Read-only SAS URL for one blob (HMAC signing, no network)."""
+    from azure.storage.blob import BlobSasPermissions, generate_blob_sas
+    from app.config import AZURE_STORAGE_ACCOUNT, AZURE_STORAGE_KEY
+
+    sas_token = generate_blob_sas(
+        account_name=AZURE_STORAGE_ACCOUNT,
+        container_name=container,
+        blob_name=blob_name,
+        account_key=AZURE_STORAGE_KEY,
+        permission=BlobSasPermissions(read=True),
+        expiry=datetime.utcfromtimestamp(expiry),
+    )
+    return f"https://{AZURE_STORAGE_ACCOUNT}.blob.core.windows.net/{container}/{blob_name}?{sas_token}"
+
+
+class SasCache:
+    """
+    Signed URLs keyed by (container, blob_name). A cached URL is reused
+    until it has less than SAS_MIN_REMAINING_SECONDS left, so callers always
+    get a token that stays valid for a while; the LRU bound caps memory.
+    """
+
+    _entries: LRUCache = LRUCache(maxsize=SAS_CACHE_MAX_ENTRIES)
+
+    @classmethod
+    def signed_url(cls, container: str, blob_name: str, now: Optional[float] = None) -> str:
+        now = time.time() if now is None else now
+        key = (container, blob_name)
+        entry = cls._entries.get(key)
+        if entry is not None and entry[1] - now >= SAS_MIN_REMAINING_SECONDS:
+            return entry[0]
+
+        expiry = sas_expiry(now)
+        url = sign_blob_url(container, blob_name, expiry)
+        cls._entries[key] = (url, expiry)
+        return url
+
+    @classmethod
+    def invalidate(cls, container: str, blob_name: str) -> None:
+        cls._entries.pop((container, blob_name), None)
+
+    @classmethod
+    def clear(cls) -> None:
+        cls._entries.clear()
@@ -4,10 +4,10 @@ from pymongo import ReturnDocument
 from bson import ObjectId
 from ..models.schedule import Schedule, UpdateScheduleBreaks
 from app.database import get_database
-import pytz
+from .slot_cache import SlotCache
+from .reference_cache import ReferenceCache
 from datetime import datetime
 
-ist = pytz.timezone("Asia/Kolkata")
 
 
 def serialize_doc(doc: dict) -> dict:
@@ -38,6 +38,8 @@ class ScheduleService:
         schedule_data.pop("_id", None)
 
         result = await schedules_collection.insert_one(schedule_data)
+        SlotCache.invalidate(schedule.doctor_id)
+        ReferenceCache.invalidate_schedule(schedule.doctor_id)
         created_schedule = await schedules_collection.find_one({"_id": result.inserted_id})
 
         if created_schedule:
@@ -69,3 +71,19 @@ class ScheduleService:
             schedules.append(Schedule(**serialize_doc(doc)))
         return schedules
 
+    @staticmethod
+    async def update_schedule_breaks(doctor_id: str, updated_breaks: UpdateScheduleBreaks) -> Schedule:
+        schedules_collection = get_database().schedules
+
+        updated_schedule = await schedules_collection.find_one_and_update(
+            {"doctor_id": doctor_id},
+            {"$set": {"breaks": [br.model_dump() for br in updated_breaks.breaks]}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if not updated_schedule:
+            raise HTTPException(status_code=404, detail="Schedule not found for doctor")
+
+        # Breaks change which slots exist on every day
+        SlotCache.invalidate(doctor_id)
+        ReferenceCache.invalidate_schedule(doctor_id)
+        return Schedule(**serialize_doc(updated_schedule))
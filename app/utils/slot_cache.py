@@ -0,0 +1,156 @@
+import math
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Iterator, Optional, Tuple
+
+from cachetools import TTLCache
+
+from app.config import SLOT_CACHE_MAX_ENTRIES, SLOT_CACHE_TTL_SECONDS
+from ..models.schedule import Schedule
+
+SLOT_MINUTES = 15
+
+
+def parse_hhmm(value: str) -> int:
+    """'09:30' -> minutes since midnight (570)."""
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+class ScheduleTemplate:
+    """
+    A doctor's weekly schedule pre-parsed onto a 15-minute grid starting at
+    `work_start`. Bit i of `open_mask` is set when slot i is outside every
+    break.
+    """
+
+    __slots__ = ("day_off", "work_start", "size", "open_mask")
+
+    def __init__(self, day_off: str, work_start: int, size: int, open_mask: int):
+        self.day_off = day_off
+        self.work_start = work_start
+        self.size = size
+        self.open_mask = open_mask
+
+    @classmethod
+    def from_schedule(cls, schedule: Schedule) -> "ScheduleTemplate":
+        work_start = parse_hhmm(schedule.start_time)
+        work_end = parse_hhmm(schedule.end_time)
+        size = max(0, (work_end - work_start) // SLOT_MINUTES)
+
+        breaks = [(parse_hhmm(br.start_time), parse_hhmm(br.end_time)) for br in schedule.breaks]
+
+        open_mask = 0
+        for i in range(size):
+            slot_start = work_start + i * SLOT_MINUTES
+            slot_end = slot_start + SLOT_MINUTES
+            if not any(br_start < slot_end and br_end > slot_start for br_start, br_end in breaks):
+                open_mask |= 1 << i
+
+        return cls(schedule.day_off, work_start, size, open_mask)
+
+    def open_mask_for(self, date_obj: date) -> int:
+        """Bookable slots on `date_obj` (none on the doctor's day off)."""
+        if self.day_off == date_obj.strftime("%A"):
+            return 0
+        return self.open_mask
+
+
+class DaySlots:
+    """
+    Slot availability for one doctor on one day, as two bitmaps over the
+    schedule grid: `open_mask` (slot exists) and `booked_mask` (slot overlaps
+    an appointment).
+    """
+
+    __slots__ = ("date", "work_start", "size", "open_mask", "booked_mask")
+
+    def __init__(self, date_obj: date, work_start: int, size: int, open_mask: int, booked_mask: int):
+        self.date = date_obj
+        self.work_start = work_start
+        self.size = size
+        self.open_mask = open_mask
+        self.booked_mask = booked_mask
+
+    @classmethod
+    def build(
+        cls,
+        template: ScheduleTemplate,
+        date_obj: date,
+        booked_intervals: Iterable[Tuple[datetime, datetime]],
+    ) -> "DaySlots":
+        """
+        Mark every grid slot overlapping one of `booked_intervals`. Each
+        interval maps directly to a contiguous run of slot indexes, so this is
+        O(slots + bookings) rather than O(slots × bookings).
+        """
+        open_mask = template.open_mask_for(date_obj)
+        day_start = datetime.combine(date_obj, time.min)
+        booked_mask = 0
+
+        for b_start, b_end in booked_intervals:
+            start_min = (b_start - day_start).total_seconds() / 60
+            end_min = (b_end - day_start).total_seconds() / 60
+            first = max(0, math.floor((start_min - template.work_start) / SLOT_MINUTES))
+            last = min(template.size, math.ceil((end_min - template.work_start) / SLOT_MINUTES))
+            if first < last:
+                booked_mask |= ((1 << (last - first)) - 1) << first
+
+        return cls(date_obj, template.work_start, template.size, open_mask, booked_mask & open_mask)
+
+    def iter_slots(self) -> Iterator[Tuple[datetime, datetime, bool]]:
+        """Yield `(start, end, is_booked)` for every slot of the day in order."""
+        day_start = datetime.combine(self.date, time.min)
+        for i in range(self.size):
+            if not (self.open_mask >> i) & 1:
+                continue
+            start = day_start + timedelta(minutes=self.work_start + i * SLOT_MINUTES)
+            yield start, start + timedelta(minutes=SLOT_MINUTES), bool((self.booked_mask >> i) & 1)
+
+    def iter_free(self, after: Optional[datetime] = None) -> Iterator[Tuple[datetime, datetime]]:
+        """Yield `(start, end)` of every free slot starting after `after`."""
+        for start, end, is_booked in self.iter_slots():
+            if is_booked or (after is not None and start <= after):
+                continue
+            yield start, end
+
+
+class SlotCache:
+    """
+    In-process cache of parsed schedules (per doctor) and day bitmaps (per
+    doctor and date). Writers that change a doctor's schedule or bookings
+    must call `invalidate`; the TTL bounds staleness from writes made by
+    other processes.
+    """
+
+    _templates: TTLCache = TTLCache(maxsize=SLOT_CACHE_MAX_ENTRIES, ttl=SLOT_CACHE_TTL_SECONDS)
+    _days: TTLCache = TTLCache(maxsize=SLOT_CACHE_MAX_ENTRIES, ttl=SLOT_CACHE_TTL_SECONDS)
+
+    @classmethod
+    def get_template(cls, doctor_id: str) -> Optional[ScheduleTemplate]:
+        return cls._templates.get(doctor_id)
+
+    @classmethod
+    def put_template(cls, doctor_id: str, template: ScheduleTemplate) -> None:
+        cls._templates[doctor_id] = template
+
+    @classmethod
+    def get_day(cls, doctor_id: str, date_str: str) -> Optional[DaySlots]:
+        return cls._days.get((doctor_id, date_str))
+
+    @classmethod
+    def put_day(cls, doctor_id: str, date_str: str, day: DaySlots) -> None:
+        cls._days[(doctor_id, date_str)] = day
+
+    @classmethod
+    def invalidate(cls, doctor_id: str, date_str: Optional[str] = None) -> None:
+        """
+        Drop one day for `doctor_id`, or (without `date_str`) its schedule and
+        every cached day.
+        """
+        if date_str is not None:
+            cls._days.pop((doctor_id, date_str), None)
+            return
+
+        cls._templates.pop(doctor_id, None)
+        for key in [k for k in list(cls._days.keys()) if k[0] == doctor_id]:
+            cls._days.pop(key, None)
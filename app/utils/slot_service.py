@@ -1,4 +1,7 @@
+import asyncio
+import heapq
 from datetime import datetime, timezone, date, time, timedelta
+from itertools import islice
 from typing import List, Dict, Any, Optional
 
 from bson import ObjectId
@@ -7,8 +10,15 @@ from fastapi import HTTPException, status
 from app.database import get_database
 from ..models.appointment import AppointmentStatus
 from ..models.schedule import Schedule
-from ..utils.email_service import send_email
+from ..utils.outbox_service import enqueue_email
 from ..utils.utils import normalize_files
+from ..utils.join_service import JoinService
+from ..utils.slot_cache import DaySlots, ScheduleTemplate, SlotCache
+from ..utils.reservation_service import ReservationService
+from ..utils.reference_cache import ReferenceCache
+
+MAX_SEARCH_DAYS = 31
+MAX_SEARCH_RESULTS = 100
 
 
 def serialize_doc(doc: dict) -> dict:
@@ -32,109 +42,63 @@ class SlotService:
     """
 
     @staticmethod
-    async def _get_doctor_schedule(doctor_oid: str,date_obj: datetime) -> List[Dict[str, time]]:
+    async def _get_schedule_template(doctor_oid: str) -> ScheduleTemplate:
         """
-        Generate slots for a doctor based on their schedule stored in MongoDB.
-
-        Args:
-            doctor_oid: The ObjectId of the doctor.
-            slot_duration: Duration of each slot in minutes (default: 15).
-
-        Returns:
-            A list of available slot dicts like:
-            [
-                {"start_time": "09:00", "end_time": "09:15"},
-                {"start_time": "09:15", "end_time": "09:30"},
-                ...
-            ]
-            or [] if today is doctor's day_off
+        Load a doctor's schedule from MongoDB and pre-parse it onto the
+        15-minute slot grid. Parsed schedules are cached per doctor.
         """
-        schedules_collection = get_database().schedules
-
         if not str(doctor_oid).startswith("DOC"):
             raise HTTPException(status_code=400, detail="Invalid Doctor ID format. Must start with 'DOC'.")
 
-        schedule_doc = await schedules_collection.find_one({"doctor_id": str(doctor_oid)})
+        template = SlotCache.get_template(str(doctor_oid))
+        if template is not None:
+            return template
+
+        schedule_doc = await ReferenceCache.get_schedule(str(doctor_oid))
         if not schedule_doc:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Schedule not found for doctor",
             )
-        # Parse into Schedule model
-        print(schedule_doc,"Ujjwal1")
-        schedule = Schedule(**serialize_doc(schedule_doc))
-        print(schedule,"Ujjwal")
-
-        # Respect day_off → if today matches, return no slots
-        weekday_name = date_obj.strftime("%A")
-        if schedule.day_off == weekday_name:
-            return []
-        
-
-        # Convert workday start/end into datetime objects
-        work_start = datetime.strptime(schedule.start_time, "%H:%M")
-        work_end = datetime.strptime(schedule.end_time, "%H:%M")
 
-        # Convert breaks into datetime intervals
-        break_intervals = []
-        for br in schedule.breaks:
-            br_start = datetime.strptime(br.start_time, "%H:%M")
-            br_end = datetime.strptime(br.end_time, "%H:%M")
-            break_intervals.append((br_start, br_end))
-
-        print(break_intervals,"Ujjwal")
-
-        slots = []
-        current = work_start
-        delta = timedelta(minutes=15)
-
-        while current + delta <= work_end:
-            slot_start = current
-            slot_end = current + delta
-
-            # Check if this slot overlaps with any break
-            overlaps_break = any(
-                br_start < slot_end and br_end > slot_start
-                for br_start, br_end in break_intervals
-            )
-
-            if not overlaps_break:
-                slots.append(
-                    {
-                        "start_time": slot_start.time(),  # return as datetime.time
-                        "end_time": slot_end.time(),
-                    }
-                )
-
-            current = slot_end
-        
-
-        return slots
+        template = ScheduleTemplate.from_schedule(Schedule(**serialize_doc(schedule_doc)))
+        SlotCache.put_template(str(doctor_oid), template)
+        return template
 
     @classmethod
-    def _generate_slots_from_schedule(
-        cls,
-        date_obj: date,
-        schedule_blocks: List[Dict[str, time]],
-        slot_minutes: int = 15,
-    ) -> List[tuple[datetime, datetime]]:
+    async def _get_day_slots(cls, doctor_id: str, date_obj: date) -> DaySlots:
         """
-        Generate time slots for a given date based on specific working blocks (schedule).
-        This correctly handles breaks.
+        Slot bitmap for a doctor on `date_obj`: served from the cache when
+        present, otherwise built from the schedule and that day's appointments.
         """
-        slots = []
-        for block in schedule_blocks:
-            start_dt = datetime.combine(date_obj, block["start_time"])
-            end_dt = datetime.combine(date_obj, block["end_time"])
-
-            current_dt = start_dt
-            while current_dt < end_dt:
-                next_dt = current_dt + timedelta(minutes=slot_minutes)
-                if next_dt > end_dt:
-                    break
-                slots.append((current_dt, next_dt))
-                current_dt = next_dt
-        return slots
+        date_str = date_obj.strftime("%Y-%m-%d")
+        day = SlotCache.get_day(doctor_id, date_str)
+        if day is not None:
+            return day
+
+        template = await cls._get_schedule_template(doctor_id)
+
+        booked_intervals = []
+        if template.open_mask_for(date_obj):
+            appointments_collection = get_database().appointments
+            day_start = datetime.combine(date_obj, time.min)
+            day_end = datetime.combine(date_obj, time.max)
+            query = {
+                "doctor_id": doctor_id,  # doctor_id stored as str in DB
+                "start_datetime": {"$lt": day_end},
+                "end_datetime": {"$gt": day_start},
+            }
+            existing_appointments = await appointments_collection.find(
+                query, {"start_datetime": 1, "end_datetime": 1}
+            ).to_list(length=None)
+            booked_intervals = [
+                (appt["start_datetime"], appt["end_datetime"])
+                for appt in existing_appointments
+            ]
+
+        day = DaySlots.build(template, date_obj, booked_intervals)
+        SlotCache.put_day(doctor_id, date_str, day)
+        return day
 
     @staticmethod
     def _overlaps(
@@ -150,50 +114,21 @@ class SlotService:
         Generate available slots for a doctor on a specific date, considering their
         actual schedule and existing appointments.
         """
-        db = get_database()
-        appointments_collection = db.appointments
-
         try:
             date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
         except ValueError:
             raise ValueError("Incorrect date format, should be YYYY-MM-DD")
-        
-       
-        schedule_blocks = await cls._get_doctor_schedule(doctor_id,date_obj)
 
-        generated_slots = cls._generate_slots_from_schedule(date_obj, schedule_blocks)
+        day = await cls._get_day_slots(doctor_id, date_obj)
 
         now = datetime.now()
-        if date_obj == now.date():
-            generated_slots = [(start, end) for start, end in generated_slots if start > now]
-        if not generated_slots:
-            return []  
-
-        day_start = datetime.combine(date_obj, time.min)
-        day_end = datetime.combine(date_obj, time.max)
-
-        query = {
-            "doctor_id": doctor_id,  # doctor_id stored as str in DB
-            "start_datetime": {"$lt": day_end},
-            "end_datetime": {"$gt": day_start},
-        }
-        existing_appointments = await appointments_collection.find(query).to_list(length=None)
-
-
-        # 4. Build list of booked intervals
-        booked_intervals = [
-            (appt["start_datetime"], appt["end_datetime"])
-            for appt in existing_appointments
-        ]
+        is_today = date_obj == now.date()
 
-        # 5. Mark slots as booked or available
+        # Mark slots as booked or available
         response_slots = []
-        print(generated_slots,"Ujjwal")
-        for start, end in generated_slots:
-            is_booked = any(
-                cls._overlaps(start, end, b_start, b_end)
-                for b_start, b_end in booked_intervals
-            )
+        for start, end, is_booked in day.iter_slots():
+            if is_today and start <= now:
+                continue
             response_slots.append(
                 {
                     "doctor_id": doctor_id,
@@ -206,6 +141,142 @@ class SlotService:
 
         return response_slots
 
+    @classmethod
+    async def search_availability(
+        cls,
+        specialization: Optional[str],
+        hospital_id: Optional[str],
+        start_date: str,
+        end_date: Optional[str] = None,
+        limit: int = 10,
+    ) -> List[Dict[str, Any]]:
+        """
+        Earliest `limit` free slots between `start_date` and `end_date`
+        (inclusive) across every doctor matching `specialization` and/or
+        `hospital_id`.
+
+        Schedules and appointments for the whole window are fetched with one
+        `$in` query each (skipping anything already in the slot cache), and the
+        per-doctor slot streams are merged with a heap so only as many slots
+        as requested are materialised.
+        """
+        if not specialization and not hospital_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Provide a specialization or a hospital_id",
+            )
+        if limit < 1 or limit > MAX_SEARCH_RESULTS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"limit must be between 1 and {MAX_SEARCH_RESULTS}",
+            )
+        try:
+            first_day = datetime.strptime(start_date, "%Y-%m-%d").date()
+            last_day = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else first_day
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Incorrect date format, should be YYYY-MM-DD",
+            )
+        if last_day < first_day or (last_day - first_day).days >= MAX_SEARCH_DAYS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Date range must be between 1 and {MAX_SEARCH_DAYS} days",
+            )
+
+        db = get_database()
+        days = [first_day + timedelta(days=i) for i in range((last_day - first_day).days + 1)]
+
+        # 1. Matching doctors
+        doctor_query: Dict[str, Any] = {}
+        if specialization:
+            doctor_query["specialization"] = specialization
+        if hospital_id:
+            doctor_query["hospital_id"] = hospital_id
+        doctors = await db.doctors.find(
+            doctor_query, {"name": 1, "specialization": 1, "hospital": 1}
+        ).to_list(length=None)
+        doctors_by_id = {doc["_id"]: doc for doc in doctors}
+        if not doctors_by_id:
+            return []
+
+        # 2. Schedules: cached templates plus one $in query for the rest
+        templates: Dict[str, ScheduleTemplate] = {}
+        missing = []
+        for doctor_id in doctors_by_id:
+            template = SlotCache.get_template(doctor_id)
+            if template is not None:
+                templates[doctor_id] = template
+            else:
+                missing.append(doctor_id)
+        if missing:
+            async for schedule_doc in db.schedules.find({"doctor_id": {"$in": missing}}):
+                template = ScheduleTemplate.from_schedule(Schedule(**serialize_doc(schedule_doc)))
+                SlotCache.put_template(schedule_doc["doctor_id"], template)
+                templates[schedule_doc["doctor_id"]] = template
+
+        # 3. Day bitmaps: cached days plus one $in query for the rest
+        day_slots: Dict[tuple, DaySlots] = {}
+        uncached_doctors = set()
+        for doctor_id in templates:
+            for day in days:
+                cached = SlotCache.get_day(doctor_id, day.strftime("%Y-%m-%d"))
+                if cached is not None:
+                    day_slots[(doctor_id, day)] = cached
+                else:
+                    uncached_doctors.add(doctor_id)
+
+        if uncached_doctors:
+            booked: Dict[tuple, List[tuple]] = {}
+            async for appt in db.appointments.find(
+                {
+                    "doctor_id": {"$in": list(uncached_doctors)},
+                    "start_datetime": {"$lt": datetime.combine(last_day, time.max)},
+                    "end_datetime": {"$gt": datetime.combine(first_day, time.min)},
+                },
+                {"doctor_id": 1, "start_datetime": 1, "end_datetime": 1},
+            ):
+                day = appt["start_datetime"].date()
+                while day <= appt["end_datetime"].date():
+                    booked.setdefault((appt["doctor_id"], day), []).append(
+                        (appt["start_datetime"], appt["end_datetime"])
+                    )
+                    day += timedelta(days=1)
+
+            for doctor_id in uncached_doctors:
+                for day in days:
+                    if (doctor_id, day) in day_slots:
+                        continue
+                    built = DaySlots.build(templates[doctor_id], day, booked.get((doctor_id, day), []))
+                    SlotCache.put_day(doctor_id, day.strftime("%Y-%m-%d"), built)
+                    day_slots[(doctor_id, day)] = built
+
+        # 4. Heap-merge the per-doctor streams (each already in time order)
+        now = datetime.now()
+
+        def doctor_stream(doctor_id: str):
+            for day in days:
+                for start, end in day_slots[(doctor_id, day)].iter_free(after=now):
+                    yield start, end, doctor_id
+
+        merged = heapq.merge(*(doctor_stream(d) for d in templates), key=lambda slot: slot[0])
+
+        results = []
+        for start, end, doctor_id in islice(merged, limit):
+            doctor = doctors_by_id[doctor_id]
+            results.append(
+                {
+                    "doctor_id": doctor_id,
+                    "doctor_name": doctor.get("name"),
+                    "specialization": doctor.get("specialization"),
+                    "hospital": doctor.get("hospital"),
+                    "date": start.strftime("%Y-%m-%d"),
+                    "start_datetime": start.isoformat(),
+                    "end_datetime": end.isoformat(),
+                }
+            )
+        return results
+
     @classmethod
     async def book_slot(
     cls,
@@ -221,12 +292,14 @@ class SlotService:
         2. doctor and patient exist in DB
         3. slot does not overlap with existing appointments
         4. slot does not fall in doctor's breaks or outside working hours
+
+        The slots are claimed in `slot_reservations` before the appointment
+        is written, so concurrent requests for the same slot are rejected by
+        the database's unique `_id` index rather than a read-then-write check.
         """
         db = get_database()
         appointments_collection = db.appointments
-        doctors_collection = db.doctors
         patients_collection = db.users
-        schedules_collection = db.schedules  # add this
 
         # 1. Validate ObjectId format
         if not str(doctor_id).startswith("DOC"):
@@ -242,21 +315,34 @@ class SlotService:
 
         patient_oid = ObjectId(patient_id)
 
-        # 2. Check if doctor and patient exist
-        if not await doctors_collection.find_one({"_id": doctor_id}):
+        # 2. Validation reads run concurrently. The overlap lookup only
+        # guards appointments booked before slot reservations existed; the
+        # reservation insert below is what rejects concurrent double bookings.
+        overlapping_query = {
+            "doctor_id": doctor_id,
+            "start_datetime": {"$lt": end_datetime},
+            "end_datetime": {"$gt": start_datetime},
+        }
+        doctor, patient, schedule, overlapping = await asyncio.gather(
+            ReferenceCache.get_doctor(doctor_id),
+            patients_collection.find_one({"_id": patient_oid, "role": "Patient"}, {"_id": 1}),
+            ReferenceCache.get_schedule(doctor_id),
+            appointments_collection.find_one(overlapping_query, {"_id": 1}),
+        )
+
+        if not doctor:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Doctor not found",
             )
 
-        if not await patients_collection.find_one({"_id": patient_oid, "role": "Patient"}):
+        if not patient:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Patient not found",
             )
 
         # 3A. Check doctor schedule
-        schedule = await schedules_collection.find_one({"doctor_id": doctor_id})
         if not schedule:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -288,19 +374,22 @@ class SlotService:
                 )
 
         # 4. Check for overlapping appointments
-        overlapping_query = {
-            "doctor_id": doctor_id,
-            "start_datetime": {"$lt": end_datetime},
-            "end_datetime": {"$gt": start_datetime},
-        }
-        if await appointments_collection.find_one(overlapping_query):
+        if overlapping:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="The requested time slot overlaps with an existing appointment.",
             )
 
-        # 5. Insert appointment
+        # 5. Reserve the slots, then insert the appointment
+        appointment_oid = ObjectId()
+        await ReservationService.reserve(
+            doctor_id,
+            appointment_oid,
+            ReservationService.slot_starts(start_datetime, end_datetime),
+        )
+
         slot_doc = {
+            "_id": appointment_oid,
             "doctor_id": doctor_id,
             "patient_id": patient_oid,
             "date": start_datetime.strftime("%Y-%m-%d"),
@@ -312,7 +401,12 @@ class SlotService:
             "status": AppointmentStatus.PENDING.value,
         }
 
-        result = await appointments_collection.insert_one(slot_doc)
+        try:
+            result = await appointments_collection.insert_one(slot_doc)
+        except Exception:
+            await ReservationService.release(appointment_oid)
+            raise
+        SlotCache.invalidate(doctor_id, slot_doc["date"])
 
         # Prepare JSON response
         slot_doc["_id"] = str(result.inserted_id)
@@ -332,7 +426,6 @@ class SlotService:
         """
         db = get_database()
         appointments_collection = db.appointments
-        doctors_collection = db.doctors
         users_collection = db.users
 
         # ✅ Validate doctor_id before casting
@@ -344,7 +437,7 @@ class SlotService:
 
         doctor_oid = doctor_id
 
-        if not await doctors_collection.find_one({"_id": doctor_oid}):
+        if not await ReferenceCache.get_doctor(doctor_oid):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Doctor not found",
@@ -375,12 +468,14 @@ class SlotService:
         ).to_list(length=None)
         cursor.sort(key=lambda x: x.get("start_datetime", 0))
 
+        _, patients_by_id = await JoinService.load_appointment_refs(
+            cursor, patients_collection=users_collection, patient_projection={"email": 1}
+        )
+
         # Convert ObjectId → str, datetime → isoformat
         appointments = []
         for doc in cursor:
-            patient = await users_collection.find_one(
-                {"_id": doc["patient_id"]}, {"email": 1}
-            )
+            patient = patients_by_id.get(doc["patient_id"])
             patient_email = patient["email"] if patient else None
             appointments.append(
                 {
@@ -414,7 +509,6 @@ class SlotService:
         """
         db = get_database()
         appointments_collection = db.appointments
-        doctors_collection = db.doctors
         users_collection = db.users
 
         # ✅ Validate doctor_id before casting
@@ -427,7 +521,7 @@ class SlotService:
         doctor_oid = doctor_id
 
         # Check doctor exists
-        if not await doctors_collection.find_one({"_id": doctor_oid}):
+        if not await ReferenceCache.get_doctor(doctor_oid):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Doctor not found",
@@ -456,12 +550,14 @@ class SlotService:
         # Sort by start_datetime (oldest → newest)
         cursor.sort(key=lambda x: x.get("start_datetime", datetime.min))
 
+        _, patients_by_id = await JoinService.load_appointment_refs(
+            cursor, patients_collection=users_collection, patient_projection={"email": 1}
+        )
+
         # Convert ObjectId → str, datetime → isoformat
         appointments = []
         for doc in cursor:
-            patient = await users_collection.find_one(
-                {"_id": doc["patient_id"]}, {"email": 1}
-            )
+            patient = patients_by_id.get(doc["patient_id"])
             patient_email = patient["email"] if patient else None
             appointments.append(
                 {
@@ -534,6 +630,9 @@ class SlotService:
         end_time = appointment.get("end_datetime")
         purpose = appointment.get("purpose")
 
+        if action in ("approve", "reject") and isinstance(start_time, datetime):
+            SlotCache.invalidate(doctor_id, start_time.strftime("%Y-%m-%d"))
+
         # Action handling
         if action == "approve":
             await appointments_collection.update_one(
@@ -574,7 +673,7 @@ class SlotService:
 </html>
 """
 
-                await send_email(patient["email"], subject, body_text,body_html)
+                await enqueue_email(patient["email"], subject, body_text,body_html)
             except Exception as e:
                 import logging
                 logging.error(f"Failed to send approval email: {e}")
@@ -617,7 +716,7 @@ class SlotService:
 </html>
 """
 
-                await send_email(patient["email"], subject, body_text,body_html)
+                await enqueue_email(patient["email"], subject, body_text,body_html)
             except Exception as e:
                 import logging
                 logging.error(f"Failed to send rejection email: {e}")
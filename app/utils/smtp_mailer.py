@@ -0,0 +1,103 @@
+import asyncio
+import logging
+from email.mime.text import MIMEText
+from typing import List, Optional
+
+import aiosmtplib
+
+from app.config import SMTP_HOST, SMTP_PASSWORD, SMTP_POOL_SIZE, SMTP_PORT, SMTP_USERNAME
+
+logger = logging.getLogger(__name__)
+
+
+class SmtpMailer:
+    """
+    Async SMTP delivery over a small pool of persistent, already
+    authenticated sessions. The STARTTLS + login handshake is paid once per
+    session rather than once per message, and nothing blocks the event loop.
+    A session that dropped is reconnected and the send retried once.
+    """
+
+    def __init__(
+        self,
+        host: str = SMTP_HOST,
+        port: int = SMTP_PORT,
+        username: Optional[str] = SMTP_USERNAME,
+        password: Optional[str] = SMTP_PASSWORD,
+        pool_size: int = SMTP_POOL_SIZE,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.pool_size = max(1, pool_size)
+        self._idle: Optional[asyncio.Queue] = None
+        self._sessions: List[aiosmtplib.SMTP] = []
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.username and self.password)
+
+    def _pool(self) -> asyncio.Queue:
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for _ in range(self.pool_size):
+                session = aiosmtplib.SMTP(hostname=self.host, port=self.port, start_tls=True)
+                self._sessions.append(session)
+                self._idle.put_nowait(session)
+        return self._idle
+
+    async def _ensure_connected(self, session: aiosmtplib.SMTP) -> None:
+        if not session.is_connected:
+            await session.connect()
+            await session.login(self.username, self.password)
+
+    async def send(self, to_email: str, subject: str, body: str) -> None:
+        if not self.configured:
+            raise RuntimeError("SMTP_USERNAME and SMTP_PASSWORD are not set")
+        msg = MIMEText(body)
+        msg["Subject"] = subject
+        msg["From"] = self.username
+        msg["To"] = to_email
+
+        pool = self._pool()
+        session = await pool.get()
+        try:
+            try:
+                await self._ensure_connected(session)
+                await session.send_message(msg)
+            except aiosmtplib.SMTPServerDisconnected:
+                # Idle sessions get dropped by the server; reconnect once
+                session.close()
+                await self._ensure_connected(session)
+                await session.send_message(msg)
+        except Exception:
+            session.close()
+            raise
+        finally:
+            pool.put_nowait(session)
+
+    async def close(self) -> None:
+        for session in self._sessions:
+            if session.is_connected:
+                try:
+                    await session.quit()
+                except aiosmtplib.SMTPException:
+                    session.close()
+        self._sessions = []
+        self._idle = None
+
+
+otp_mailer = SmtpMailer()
+
+
+async def send_otp_email(to_email: str, subject: str, body: str) -> None:
+    """Deliver an OTP email; failures are logged, never raised."""
+    if not otp_mailer.configured:
+        logger.warning("SMTP credentials are not set; OTP email not sent")
+        return
+    try:
+        await otp_mailer.send(to_email, subject, body)
+    except Exception as e:
+        # SMTP errors can echo the recipient back, so only the type is logged
+        logger.error("Failed to send OTP email: %s", type(e).__name__)
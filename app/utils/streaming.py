@@ -0,0 +1,62 @@
+from typing import AsyncIterator, Optional, Tuple
+
+
+def parse_byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range `Range: bytes=...` header against a resource of
+    `size` bytes and return the inclusive `(start, end)` to serve.
+
+    Returns None when the whole resource should be served (no header, a
+    non-bytes unit or a multi-range request, which we answer with 200).
+    Raises ValueError when the range cannot be satisfied (-> 416).
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first == "":
+            # suffix range: the last N bytes
+            suffix = int(last)
+            if suffix <= 0:
+                raise ValueError("Empty suffix range")
+            start, end = max(0, size - suffix), size - 1
+        else:
+            start = int(first)
+            end = int(last) if last else size - 1
+            end = min(end, size - 1)
+    except ValueError:
+        raise ValueError(f"Malformed range: {header}")
+
+    if start < 0 or start >= size or end < start:
+        raise ValueError(f"Unsatisfiable range: {header}")
+    return start, end
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """True when an `If-None-Match` header matches `etag` (weak comparison)."""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    def normalize(tag: str) -> str:
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        return tag.strip('"')
+
+    wanted = normalize(etag)
+    return any(normalize(candidate) == wanted for candidate in if_none_match.split(","))
+
+
+async def stream_chunks(downloader) -> AsyncIterator[bytes]:
+    """
+    Yield a blob download chunk by chunk as it arrives, so only about one
+    chunk (`BLOB_DOWNLOAD_CHUNK_SIZE`) is held in memory per request.
+    """
+    async for chunk in downloader.chunks():
+        yield chunk
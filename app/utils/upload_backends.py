@@ -0,0 +1,103 @@
+import asyncio
+import base64
+import os
+import shutil
+from typing import Optional
+
+from app.config import UPLOAD_BACKEND, UPLOAD_DIR
+
+
+def block_id(index: int) -> str:
+    """Azure block ids must be base64 and the same length within a blob."""
+    return base64.b64encode(f"{index:08d}".encode()).decode()
+
+
+class AzureBlockBackend:
+    """
+    Chunks are staged as uncommitted blocks on the final blob and become
+    visible only when the block list is committed. Blocks that are never
+    committed are garbage-collected by Azure after 7 days.
+    """
+
+    async def stage(self, blob_name: str, index: int, data: bytes) -> None:
+        from .blob_storage import get_container_client
+
+        blob_client = get_container_client().get_blob_client(blob_name)
+        await blob_client.stage_block(block_id(index), data, length=len(data))
+
+    async def commit(self, blob_name: str, total_chunks: int, content_type: Optional[str] = None) -> str:
+        from azure.storage.blob import BlobBlock, ContentSettings
+        from .blob_storage import get_container_client
+
+        blob_client = get_container_client().get_blob_client(blob_name)
+        await blob_client.commit_block_list(
+            [BlobBlock(block_id=block_id(i)) for i in range(total_chunks)],
+            content_settings=ContentSettings(content_type=content_type) if content_type else None,
+        )
+        return blob_client.url
+
+    async def abort(self, blob_name: str) -> None:
+        # Nothing to do: uncommitted blocks expire on their own
+        return None
+
+
+class LocalFileBackend:
+    """
+    Filesystem mirror of AzureBlockBackend for offline runs. Chunks are kept
+    as numbered part files and concatenated into UPLOAD_DIR on commit, which
+    is served under /files.
+    """
+
+    def __init__(self, root: str = UPLOAD_DIR):
+        self.root = root
+        self.parts_root = os.path.join(root, ".parts")
+
+    @staticmethod
+    def _under(root: str, blob_name: str) -> str:
+        """`root`/`blob_name`, refusing any name that resolves outside `root`."""
+        root = os.path.realpath(root)
+        path = os.path.realpath(os.path.join(root, blob_name))
+        if os.path.commonpath([root, path]) != root or path == root:
+            raise ValueError(f"Invalid blob name: {blob_name!r}")
+        return path
+
+    def _parts_dir(self, blob_name: str) -> str:
+        return self._under(self.parts_root, blob_name)
+
+    def _write_part(self, blob_name: str, index: int, data: bytes) -> None:
+        parts_dir = self._parts_dir(blob_name)
+        os.makedirs(parts_dir, exist_ok=True)
+        # Write then rename so a retried chunk never leaves a torn part behind
+        tmp_path = os.path.join(parts_dir, f"{index:08d}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, os.path.join(parts_dir, f"{index:08d}"))
+
+    def _assemble(self, blob_name: str, total_chunks: int) -> None:
+        parts_dir = self._parts_dir(blob_name)
+        target = self._under(self.root, blob_name)
+        with open(target + ".tmp", "wb") as out:
+            for i in range(total_chunks):
+                with open(os.path.join(parts_dir, f"{i:08d}"), "rb") as part:
+                    shutil.copyfileobj(part, out)
+        os.replace(target + ".tmp", target)
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+    async def stage(self, blob_name: str, index: int, data: bytes) -> None:
+        await asyncio.to_thread(self._write_part, blob_name, index, data)
+
+    async def commit(self, blob_name: str, total_chunks: int, content_type: Optional[str] = None) -> str:
+        await asyncio.to_thread(self._assemble, blob_name, total_chunks)
+        return f"/files/{blob_name}"
+
+    async def abort(self, blob_name: str) -> None:
+        await asyncio.to_thread(shutil.rmtree, self._parts_dir(blob_name), True)
+
+
+def get_upload_backend(kind: Optional[str] = None):
+    kind = (kind or UPLOAD_BACKEND).lower()
+    if kind == "local":
+        return LocalFileBackend()
+    if kind == "azure":
+        return AzureBlockBackend()
+    raise ValueError(f"Unknown upload backend: {kind}")
@@ -0,0 +1,191 @@
+import math
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+
+from app.config import (
+    UPLOAD_CHUNK_SIZE,
+    UPLOAD_MAX_CHUNK_SIZE,
+    UPLOAD_MAX_FILE_SIZE,
+    UPLOAD_SESSION_TTL_HOURS,
+)
+from app.database import get_database
+from .blob_storage import clean_filename
+from .upload_backends import get_upload_backend
+
+OPEN = "open"
+COMMITTING = "committing"
+COMMITTED = "committed"
+
+
+class UploadSessionService:
+    """
+    Resumable uploads. A session is created up front with the file size and
+    chunk size; chunks can then be sent in any order and in parallel, and
+    retried individually. Progress lives in the `upload_sessions` collection
+    so a client can ask which chunks are still missing after a dropped
+    connection. Committing assembles the chunks into the final blob and,
+    when the session is tied to an appointment, attaches it as a medical
+    record. Unfinished sessions expire via a TTL index on `expires_at`.
+    """
+
+    backend = None
+
+    @staticmethod
+    def _collection():
+        return get_database().upload_sessions
+
+    @classmethod
+    def _backend(cls):
+        if cls.backend is None:
+            cls.backend = get_upload_backend()
+        return cls.backend
+
+    @staticmethod
+    def chunk_length(session: dict, index: int) -> int:
+        """Expected size of chunk `index`; only the last one may be short."""
+        if index == session["total_chunks"] - 1:
+            return session["size"] - index * session["chunk_size"]
+        return session["chunk_size"]
+
+    @staticmethod
+    def progress(session: dict) -> Dict:
+        received = set(session.get("received", []))
+        missing = [i for i in range(session["total_chunks"]) if i not in received]
+        return {
+            "upload_id": session["_id"],
+            "filename": session["filename"],
+            "status": session["status"],
+            "size": session["size"],
+            "chunk_size": session["chunk_size"],
+            "total_chunks": session["total_chunks"],
+            "received_chunks": len(received),
+            "missing_chunks": missing,
+            "expires_at": session["expires_at"].isoformat(),
+        }
+
+    @classmethod
+    async def create(
+        cls,
+        user_id: str,
+        filename: str,
+        size: int,
+        content_type: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+        appointment_id: Optional[str] = None,
+    ) -> dict:
+        chunk_size = chunk_size or UPLOAD_CHUNK_SIZE
+        if size <= 0:
+            raise HTTPException(status_code=400, detail="File size must be positive")
+        if size > UPLOAD_MAX_FILE_SIZE:
+            raise HTTPException(status_code=413, detail=f"File exceeds {UPLOAD_MAX_FILE_SIZE} bytes")
+        if chunk_size <= 0 or chunk_size > UPLOAD_MAX_CHUNK_SIZE:
+            raise HTTPException(status_code=400, detail=f"chunk_size must be between 1 and {UPLOAD_MAX_CHUNK_SIZE}")
+
+        if appointment_id:
+            if not ObjectId.is_valid(appointment_id):
+                raise HTTPException(status_code=400, detail="Invalid appointment_id")
+            if not await get_database().appointments.find_one({"_id": ObjectId(appointment_id)}, {"_id": 1}):
+                raise HTTPException(status_code=404, detail="Appointment not found")
+
+        safe_filename = clean_filename(filename)
+        now = datetime.utcnow()
+        session = {
+            "_id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "filename": safe_filename,
+            "blob_name": f"{uuid.uuid4().hex}_{safe_filename}",
+            "content_type": content_type,
+            "size": size,
+            "chunk_size": chunk_size,
+            "total_chunks": math.ceil(size / chunk_size),
+            "received": [],
+            "appointment_id": appointment_id,
+            "status": OPEN,
+            "created_at": now,
+            "updated_at": now,
+            "expires_at": now + timedelta(hours=UPLOAD_SESSION_TTL_HOURS),
+        }
+        await cls._collection().insert_one(session)
+        return session
+
+    @classmethod
+    async def get(cls, upload_id: str, user_id: str) -> dict:
+        session = await cls._collection().find_one({"_id": upload_id})
+        if not session:
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        if session["user_id"] != user_id:
+            raise HTTPException(status_code=403, detail="Not your upload session")
+        return session
+
+    @classmethod
+    async def upload_chunk(cls, upload_id: str, index: int, data: bytes, user_id: str) -> dict:
+        session = await cls.get(upload_id, user_id)
+        if session["status"] != OPEN:
+            raise HTTPException(status_code=409, detail=f"Upload is {session['status']}")
+        if index < 0 or index >= session["total_chunks"]:
+            raise HTTPException(status_code=400, detail=f"Chunk index must be in [0, {session['total_chunks']})")
+        expected = cls.chunk_length(session, index)
+        if len(data) != expected:
+            raise HTTPException(status_code=400, detail=f"Chunk {index} must be {expected} bytes, got {len(data)}")
+
+        await cls._backend().stage(session["blob_name"], index, data)
+
+        # $addToSet keeps retried chunks idempotent and concurrent chunks safe
+        session = await cls._collection().find_one_and_update(
+            {"_id": upload_id, "status": OPEN},
+            {"$addToSet": {"received": index}, "$set": {"updated_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if not session:
+            raise HTTPException(status_code=409, detail="Upload is no longer open")
+        return cls.progress(session)
+
+    @classmethod
+    async def commit(cls, upload_id: str, user_id: str) -> Dict[str, str]:
+        session = await cls.get(upload_id, user_id)
+        if session["status"] == COMMITTED:
+            return session["record"]
+
+        missing: List[int] = cls.progress(session)["missing_chunks"]
+        if missing:
+            raise HTTPException(status_code=409, detail={"message": "Upload incomplete", "missing_chunks": missing})
+
+        # Only one commit may assemble the blob
+        claimed = await cls._collection().find_one_and_update(
+            {"_id": upload_id, "status": OPEN},
+            {"$set": {"status": COMMITTING, "updated_at": datetime.utcnow()}},
+        )
+        if not claimed:
+            raise HTTPException(status_code=409, detail="Upload is already being committed")
+
+        try:
+            url = await cls._backend().commit(session["blob_name"], session["total_chunks"], session["content_type"])
+        except Exception:
+            await cls._collection().update_one({"_id": upload_id}, {"$set": {"status": OPEN}})
+            raise
+
+        record = {"filename": session["filename"], "filepath": url, "blob_name": session["blob_name"]}
+        if session.get("appointment_id"):
+            await get_database().appointments.update_one(
+                {"_id": ObjectId(session["appointment_id"])},
+                {"$push": {"medical_records": record}},
+            )
+
+        await cls._collection().update_one(
+            {"_id": upload_id},
+            {"$set": {"status": COMMITTED, "record": record, "updated_at": datetime.utcnow()}},
+        )
+        return record
+
+    @classmethod
+    async def abort(cls, upload_id: str, user_id: str) -> None:
+        session = await cls.get(upload_id, user_id)
+        if session["status"] != OPEN:
+            raise HTTPException(status_code=409, detail=f"Upload is {session['status']}")
+        await cls._backend().abort(session["blob_name"])
+        await cls._collection().delete_one({"_id": upload_id, "status": OPEN})
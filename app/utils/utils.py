@@ -1,7 +1,5 @@
 from datetime import date, datetime
 from typing import Any, Dict, List
-from ..config import API_BASE_URL
-from ..config import AZURE_STORAGE_ACCOUNT, AZURE_STORAGE_KEY
 
 def to_iso_date(value: Any) -> str:
     if isinstance(value, (datetime, date)):
@@ -13,8 +11,7 @@ import os
 
 
 
-from azure.storage.blob import generate_blob_sas, BlobSasPermissions
-from datetime import datetime, timedelta
+from .sas_cache import SasCache
 
 def normalize_files(files: List[Dict]) -> List[Dict]:
     """
@@ -31,6 +28,11 @@ def normalize_files(files: List[Dict]) -> List[Dict]:
 
         filename = f.get("filename")
 
+        # Files written by the local upload backend are served from /files
+        if str(blob_path).startswith("/"):
+            normalized.append({"filename": filename, "url": blob_path})
+            continue
+
         # Handle both "container/blob" format and full URL format
         if str(blob_path).startswith("http"):
             # Extract container and blob name from full URL
@@ -39,17 +41,8 @@ def normalize_files(files: List[Dict]) -> List[Dict]:
         else:
             container, blob_name = blob_path.split("/", 1)
 
-        # Always generate SAS (since container is private)
-        sas_token = generate_blob_sas(
-            account_name=AZURE_STORAGE_ACCOUNT,
-            container_name=container,
-            blob_name=blob_name,
-            account_key=AZURE_STORAGE_KEY,
-            permission=BlobSasPermissions(read=True),
-            expiry=datetime.utcnow() + timedelta(hours=1)
-        )
-
-        file_url = f"https://{AZURE_STORAGE_ACCOUNT}.blob.core.windows.net/{container}/{blob_name}?{sas_token}"
+        # Always sign (since container is private); signatures are cached per blob
+        file_url = SasCache.signed_url(container, blob_name)
 
         normalized.append({
             "filename": filename,
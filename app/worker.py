@@ -0,0 +1,47 @@
+"""
+Standalone email outbox worker.
+
+    python -m app.worker --batch-size 50 --concurrency 4
+    EMAIL_SENDER=fake python -m app.worker --once   # offline, drains once
+
+Run with OUTBOX_INPROCESS_WORKER=false on the API processes when this is
+deployed separately.
+"""
+import argparse
+import asyncio
+import logging
+import signal
+
+from app.config import EMAIL_SEND_CONCURRENCY, OUTBOX_BATCH_SIZE, OUTBOX_POLL_INTERVAL_SECONDS
+from app.utils.email_service import close_email_client, get_email_sender
+from app.utils.outbox_service import OutboxService, OutboxWorker
+
+
+async def main(args):
+    sender = get_email_sender(args.sender)
+
+    try:
+        if args.once:
+            summary = await OutboxService.drain_once(sender, args.batch_size, args.concurrency)
+            print(f"📬 Outbox drained: {summary}")
+            return
+
+        worker = OutboxWorker(sender, args.batch_size, args.concurrency, args.poll_interval)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, worker.request_stop)
+        await worker.run()
+    finally:
+        await close_email_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drain the email outbox")
+    parser.add_argument("--batch-size", type=int, default=OUTBOX_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=EMAIL_SEND_CONCURRENCY)
+    parser.add_argument("--poll-interval", type=float, default=OUTBOX_POLL_INTERVAL_SECONDS)
+    parser.add_argument("--sender", choices=["acs", "fake"], default=None,
+                        help="overrides EMAIL_SENDER")
+    parser.add_argument("--once", action="store_true", help="drain a single batch and exit")
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,91 @@
+"""
+Memory-ceiling check for streamed file downloads.
+
+Pushes a large fake blob through `stream_chunks` (the generator behind
+GET /patients/files/{filename}) and reports the peak Python heap used while
+the body is consumed. With streaming the peak stays around one chunk no
+matter how big the file is; reading the whole blob first would peak at the
+file size. No Azure access is needed.
+
+    python -m scripts.bench_download_memory --size-mb 256 --chunk-mb 4
+"""
+import argparse
+import asyncio
+import sys
+import tracemalloc
+
+from app.utils.streaming import parse_byte_range, stream_chunks
+
+MB = 1024 * 1024
+
+
+class FakeDownloader:
+    """Mimics StorageStreamDownloader.chunks() for a blob of `size` bytes."""
+
+    def __init__(self, size: int, chunk_size: int, offset: int = 0, length: int = None):
+        self.offset = offset
+        self.length = size - offset if length is None else length
+        self.chunk_size = chunk_size
+
+    async def chunks(self):
+        remaining = self.length
+        while remaining > 0:
+            n = min(self.chunk_size, remaining)
+            remaining -= n
+            await asyncio.sleep(0)
+            yield bytes(n)
+
+
+async def consume(body) -> int:
+    """Drain a response body the way the ASGI server would, discarding bytes."""
+    total = 0
+    async for chunk in body:
+        total += len(chunk)
+    return total
+
+
+async def readall(downloader) -> int:
+    data = b"".join([chunk async for chunk in downloader.chunks()])
+    return len(data)
+
+
+async def main(args) -> int:
+    size = args.size_mb * MB
+    chunk_size = args.chunk_mb * MB
+    ceiling = args.ceiling_chunks * chunk_size
+
+    tracemalloc.start()
+    sent = await consume(stream_chunks(FakeDownloader(size, chunk_size)))
+    _, streamed_peak = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+
+    start, end = parse_byte_range(f"bytes={size // 2}-", size)
+    ranged = await consume(stream_chunks(FakeDownloader(size, chunk_size, start, end - start + 1)))
+    _, ranged_peak = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+
+    buffered_peak = None
+    if args.compare:
+        await readall(FakeDownloader(size, chunk_size))
+        _, buffered_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"blob {args.size_mb} MB, chunk {args.chunk_mb} MB, ceiling {ceiling / MB:.1f} MB")
+    print(f"streamed full : {sent / MB:.0f} MB sent, peak {streamed_peak / MB:.2f} MB")
+    print(f"streamed range: {ranged / MB:.0f} MB sent, peak {ranged_peak / MB:.2f} MB")
+    if buffered_peak is not None:
+        print(f"readall()     : peak {buffered_peak / MB:.2f} MB")
+
+    ok = sent == size and streamed_peak <= ceiling and ranged_peak <= ceiling
+    print("PASS" if ok else "FAIL: peak memory above ceiling")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--chunk-mb", type=int, default=4)
+    parser.add_argument("--ceiling-chunks", type=float, default=3,
+                        help="allowed peak, as a multiple of the chunk size")
+    parser.add_argument("--compare", action="store_true", help="also measure reading the whole blob first")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,78 @@
+"""
+Login-throughput benchmark for the password hasher at several scrypt costs.
+
+Runs `--logins` concurrent verifications through the same bounded thread
+pool login uses and reports logins/second, per-login latency and how
+responsive the event loop stayed (worst delay of a 10 ms ticker), so the
+cost can be chosen against a throughput budget. No database is needed.
+
+    python -m scripts.bench_login --costs 13 14 15 --logins 64 --workers 4
+"""
+import argparse
+import asyncio
+import hashlib
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import app.utils.password_hasher as password_hasher_module
+from app.utils.password_hasher import ScryptHasher, verify_password_async
+
+
+async def ticker(stop: asyncio.Event, delays: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        delays.append(time.perf_counter() - start - 0.01)
+
+
+async def run(hasher: ScryptHasher, encoded: str, logins: int):
+    latencies, delays = [], []
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(stop, delays))
+
+    async def login():
+        start = time.perf_counter()
+        assert await verify_password_async("correct horse", encoded, hasher)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick
+    return elapsed, latencies, max(delays, default=0)
+
+
+async def main(args):
+    # Size the shared pool like PASSWORD_HASH_WORKERS would
+    password_hasher_module._executor = ThreadPoolExecutor(max_workers=args.workers)
+
+    print(f"{args.logins} concurrent logins, {args.workers} hash workers")
+    print(f"{'cost':<14}{'single':>10}{'logins/s':>10}{'p50':>10}{'max':>10}{'loop lag':>10}")
+
+    legacy = hashlib.sha256(b"correct horse").hexdigest()
+    rows = [("sha256 legacy", ScryptHasher(), legacy)]
+    for log_n in args.costs:
+        hasher = ScryptHasher(n=2 ** log_n, r=args.r, p=args.p)
+        rows.append((f"scrypt N=2^{log_n}", hasher, hasher.hash("correct horse")))
+
+    for label, hasher, encoded in rows:
+        start = time.perf_counter()
+        hasher.verify("correct horse", encoded)
+        single = time.perf_counter() - start
+        elapsed, latencies, lag = await run(hasher, encoded, args.logins)
+        print(
+            f"{label:<14}{single * 1000:>8.1f}ms{args.logins / elapsed:>10.1f}"
+            f"{statistics.median(latencies) * 1000:>8.1f}ms{max(latencies) * 1000:>8.1f}ms{lag * 1000:>8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--costs", type=int, nargs="+", default=[13, 14, 15], help="log2 of scrypt N")
+    parser.add_argument("--r", type=int, default=8)
+    parser.add_argument("--p", type=int, default=1)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=4)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,67 @@
+"""
+Benchmark reminder dispatch against a fake email client.
+
+Compares the old one-at-a-time loop with the bounded worker pool used by
+ReminderService. No Mongo or ACS access is needed.
+
+    python -m scripts.bench_reminders --appointments 500 --latency 0.2
+"""
+import argparse
+import asyncio
+import time
+
+from app.utils.dispatch import RateLimiter, run_bounded
+
+
+class FakeEmailClient:
+    """Stands in for ACS: every send takes `latency` seconds."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.sent = 0
+
+    async def send_email(self, recipient_email, subject, body, body_html=None):
+        await asyncio.sleep(self.latency)
+        self.sent += 1
+
+
+async def sequential(jobs, client):
+    for job in jobs:
+        await client.send_email(job, "Appointment Reminder", "body")
+
+
+async def pooled(jobs, client, concurrency, rate):
+    async def send_one(job):
+        await client.send_email(job, "Appointment Reminder", "body")
+        return True
+
+    await run_bounded(jobs, send_one, concurrency, RateLimiter(rate))
+
+
+async def main(args):
+    jobs = [f"patient{i}@example.com" for i in range(args.appointments)]
+
+    client = FakeEmailClient(args.latency)
+    start = time.perf_counter()
+    await sequential(jobs, client)
+    seq_elapsed = time.perf_counter() - start
+    print(f"sequential:            {seq_elapsed:8.2f}s  ({client.sent} sent)")
+
+    for concurrency in args.concurrency:
+        client = FakeEmailClient(args.latency)
+        start = time.perf_counter()
+        await pooled(jobs, client, concurrency, args.rate)
+        elapsed = time.perf_counter() - start
+        print(
+            f"pool concurrency={concurrency:<3} {elapsed:8.2f}s  ({client.sent} sent, "
+            f"{seq_elapsed / elapsed:5.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--appointments", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds per fake send")
+    parser.add_argument("--rate", type=float, default=0, help="sends per second, 0 = unlimited")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[4, 8, 16, 32])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,62 @@
+"""
+Micro-benchmark: sign medical record URLs for a listing with and without
+the SAS cache.
+
+"uncached" signs every record on every listing, like normalize_files used
+to; "cached (cold)" is the first listing after a restart and "cached
+(warm)" every listing after it. Signing is local HMAC work, so only the
+Azure SDK is needed (any base64 account key works).
+
+    AZURE_STORAGE_KEY=$(python -c "import base64,os;print(base64.b64encode(os.urandom(64)).decode())") \\
+        python -m scripts.bench_sas_cache --records 10000 --listings 5
+"""
+import argparse
+import time
+
+from app.config import AZURE_STORAGE_ACCOUNT
+from app.utils.sas_cache import SasCache, sas_expiry, sign_blob_url
+from app.utils.utils import normalize_files
+
+
+def make_records(n: int, container: str):
+    base = f"https://{AZURE_STORAGE_ACCOUNT}.blob.core.windows.net/{container}"
+    return [{"filename": f"report_{i}.pdf", "filepath": f"{base}/{i:032x}_report_{i}.pdf"} for i in range(n)]
+
+
+def uncached_listing(records, container: str):
+    out = []
+    for record in records:
+        blob_name = record["filepath"].split(f"/{container}/", 1)[1]
+        out.append({"filename": record["filename"], "url": sign_blob_url(container, blob_name, sas_expiry(time.time()))})
+    return out
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main(args):
+    records = make_records(args.records, args.container)
+
+    uncached = [timed(uncached_listing, records, args.container) for _ in range(args.listings)]
+
+    SasCache.clear()
+    cold = timed(normalize_files, records)
+    warm = [timed(normalize_files, records) for _ in range(args.listings)]
+
+    per = lambda seconds: seconds / args.records * 1e6
+    print(f"{args.records} records, {args.listings} listings")
+    print(f"uncached      : {min(uncached) * 1000:8.1f} ms/listing ({per(min(uncached)):.1f} us/record)")
+    print(f"cached (cold) : {cold * 1000:8.1f} ms/listing ({per(cold):.1f} us/record)")
+    print(f"cached (warm) : {min(warm) * 1000:8.1f} ms/listing ({per(min(warm)):.1f} us/record)")
+    print(f"warm speedup  : {min(uncached) / min(warm):.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--listings", type=int, default=5)
+    parser.add_argument("--container", default="medical-records")
+    main(parser.parse_args())
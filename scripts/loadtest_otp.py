@@ -0,0 +1,87 @@
+"""
+Load test: fire many OTP requests at a running API and check that other
+endpoints stay responsive meanwhile.
+
+A probe request (GET /openapi.json by default) is issued in a loop before
+and during the OTP burst; if OTP delivery blocked the event loop, the
+probe latency during the burst would grow with the SMTP handshake time.
+
+    # lift the per-email OTP rate limit, or most requests get 429
+    OTP_RATE_LIMIT_COUNT=100000 uvicorn app.main:app &
+    python -m scripts.loadtest_otp --base-url http://127.0.0.1:8000 \\
+        --email registered.user@example.com --requests 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def summarize(label: str, samples):
+    if not samples:
+        print(f"{label}: no samples")
+        return
+    ordered = sorted(samples)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    print(
+        f"{label}: n={len(samples)} p50={statistics.median(ordered) * 1000:.1f}ms "
+        f"p95={p95 * 1000:.1f}ms max={ordered[-1] * 1000:.1f}ms"
+    )
+
+
+async def probe(client: httpx.AsyncClient, path: str, stop: asyncio.Event, samples: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get(path)
+        samples.append(time.perf_counter() - start)
+        await asyncio.sleep(0.01)
+
+
+async def main(args):
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+        # Baseline probe latency with no OTP traffic
+        baseline = []
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(client, args.probe_path, stop, baseline))
+        await asyncio.sleep(args.baseline_seconds)
+        stop.set()
+        await task
+
+        # Probe latency while the OTP burst is in flight
+        during, otp_latencies, errors = [], [], 0
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(client, args.probe_path, stop, during))
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def request_otp():
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                resp = await client.get("/api/auth/verify-user-email", params={"email": args.email})
+                otp_latencies.append(time.perf_counter() - start)
+                if resp.status_code != 200:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(request_otp() for _ in range(args.requests)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await probe_task
+
+    print(f"{args.requests} OTP requests in {elapsed:.2f}s ({errors} errors)")
+    summarize("otp requests      ", otp_latencies)
+    summarize("probe (baseline)  ", baseline)
+    summarize("probe (under load)", during)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--email", required=True, help="a registered user's email")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--probe-path", default="/openapi.json")
+    parser.add_argument("--baseline-seconds", type=float, default=3.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,98 @@
+"""
+Import-time profile of the API.
+
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter,
+parses the per-module timings from stderr and writes a report with the
+slowest modules (cumulative and self time) and the cost per top-level
+package. Run it before and after touching imports to see what cold start
+pays for.
+
+    python -m scripts.profile_imports --output importtime_report.txt
+    python -m scripts.profile_imports --module app.routes.patients --top 40
+"""
+import argparse
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, NamedTuple
+
+LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+class ImportTiming(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def run_importtime(module: str, python: str = sys.executable) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+
+
+def parse(stderr: str) -> List[ImportTiming]:
+    timings = []
+    for line in stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            # -X importtime indents nested imports by two spaces per level
+            timings.append(ImportTiming(module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return timings
+
+
+def by_package(timings: List[ImportTiming]) -> Dict[str, int]:
+    totals: Dict[str, int] = defaultdict(int)
+    for timing in timings:
+        totals[timing.module.split(".")[0]] += timing.self_us
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def render(module: str, timings: List[ImportTiming], top: int, errors: str = "") -> str:
+    total_us = sum(t.self_us for t in timings)
+    lines = [f"Import profile for `{module}`: {len(timings)} modules, {total_us / 1000:.1f} ms total", ""]
+
+    lines.append(f"Top {top} by cumulative time (ms):")
+    for t in sorted(timings, key=lambda t: t.cumulative_us, reverse=True)[:top]:
+        lines.append(f"  {t.cumulative_us / 1000:9.1f}  {t.module}")
+
+    lines += ["", f"Top {top} by self time (ms):"]
+    for t in sorted(timings, key=lambda t: t.self_us, reverse=True)[:top]:
+        lines.append(f"  {t.self_us / 1000:9.1f}  {t.module}")
+
+    lines += ["", "Self time by top-level package (ms):"]
+    for package, us in list(by_package(timings).items())[:top]:
+        lines.append(f"  {us / 1000:9.1f}  {package}")
+
+    if errors:
+        lines += ["", "Import failed (timings above cover what loaded before the error):", errors]
+    return "\n".join(lines) + "\n"
+
+
+def main(args):
+    result = run_importtime(args.module, args.python)
+    timings = parse(result.stderr)
+    errors = ""
+    if result.returncode != 0:
+        errors = "\n".join(l for l in result.stderr.splitlines() if not LINE.match(l) and not l.startswith("import time:"))
+
+    report = render(args.module, timings, args.top, errors)
+    with open(args.output, "w") as f:
+        f.write(report)
+    print(report)
+    print(f"Report written to {args.output}")
+    return 0 if result.returncode == 0 else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--output", default="importtime_report.txt")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--python", default=sys.executable, help="interpreter to profile with")
+    sys.exit(main(parser.parse_args()))